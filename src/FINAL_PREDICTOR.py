@@ -1,32 +1,15 @@
+import os
 import pandas as pd
 import joblib
+from identity_registry import IdentityRegistry
+from config import MODEL_PATH, PREDICTION_INPUT_PATH, PREDICTIONS_PATH, UPCOMING_RACE_ID, UPCOMING_GRAND_PRIX
 
-def predict_winners(model_path, new_data_path, upcoming_race_id, grand_prix_name, output_path=None):
+def predict_winners(model_path, new_data_path, upcoming_race_id, grand_prix_name, output_path=None, explain=False):
     # =============================
-    # 🏎️ 1. Driver ID → Name Map
+    # 🏎️ 1. Driver Names (identity registry)
     # =============================
-    driver_map = {
-        1: "VER",   # Max Verstappen
-        11: "PER",  # Sergio Pérez
-        16: "LEC",  # Charles Leclerc
-        55: "SAI",  # Carlos Sainz
-        44: "HAM",  # Lewis Hamilton
-        63: "RUS",  # George Russell
-        4: "NOR",   # Lando Norris
-        81: "PIA",  # Oscar Piastri
-        10: "GAS",  # Pierre Gasly
-        31: "OCO",  # Esteban Ocon
-        18: "STR",  # Lance Stroll
-        14: "ALO",  # Fernando Alonso
-        27: "HUL",  # Nico Hülkenberg
-        20: "MAG",  # Kevin Magnussen
-        23: "ALB",  # Alex Albon
-        2:  "SAR",  # Logan Sargeant
-        24: "ZHO",  # Zhou Guanyu
-        77: "BOT",  # Valtteri Bottas
-        3:  "RIC",  # Daniel Ricciardo
-        22: "TSU",  # Yuki Tsunoda
-    }
+    registry = IdentityRegistry()
+    season = int(upcoming_race_id.split('_')[0]) if '_' in upcoming_race_id else int(upcoming_race_id)
 
     # =============================
     # 2. Load Model & Data
@@ -34,8 +17,8 @@ def predict_winners(model_path, new_data_path, upcoming_race_id, grand_prix_name
     model = joblib.load(model_path)
     X_pred_full = pd.read_csv(new_data_path)
 
-    # Keep Driver_ID and drop from features
-    X_pred = X_pred_full.drop(columns=['Driver_ID']) if 'Driver_ID' in X_pred_full.columns else X_pred_full.copy()
+    # Keep Driver_ID / Driver_Code and drop from features
+    X_pred = X_pred_full.drop(columns=['Driver_ID', 'Driver_Code'], errors='ignore')
 
     # =============================
     # 3. Predict Win Probabilities
@@ -47,6 +30,12 @@ def predict_winners(model_path, new_data_path, upcoming_race_id, grand_prix_name
 
     X_pred_full['Win_Probability'] = probs
 
+    # Optional: why each driver scored what they did (native tree contributions)
+    if explain:
+        from explainer import ExplanationCache, top_features
+        contribs = ExplanationCache(model).explain(X_pred)
+        X_pred_full['Top_Factors'] = top_features(contribs)
+
     # =============================
     # 4. Select Winners / Top 3
     # =============================
@@ -66,8 +55,11 @@ def predict_winners(model_path, new_data_path, upcoming_race_id, grand_prix_name
     print("🏆 Predicted Winners:")
     for i, row in enumerate(winners.itertuples(), 1):
         driver_id = row.Driver_ID
-        driver_name = driver_map.get(driver_id, f"Driver_{driver_id}")  # fallback if unknown
+        driver_code = getattr(row, 'Driver_Code', None) or registry.driver_for_number(driver_id, season)
+        driver_name = registry.name("driver", driver_code) or f"Driver_{driver_id}"  # fallback if unknown
         print(f"{i}. {driver_name} (Driver ID: {driver_id}) — Win Probability: {row.Win_Probability:.3f}")
+        if explain:
+            print(f"   ↳ {row.Top_Factors}")
 
     # =============================
     # 6. Optional Save
@@ -75,16 +67,21 @@ def predict_winners(model_path, new_data_path, upcoming_race_id, grand_prix_name
     if output_path:
         X_pred_full.to_csv(output_path, index=False)
         print(f"\n✅ Predictions saved to: {output_path}")
+        if explain:
+            contrib_path = os.path.splitext(output_path)[0] + '_contributions.csv'
+            pd.concat([X_pred_full[['Driver_ID']], contribs], axis=1).to_csv(contrib_path, index=False)
+            print(f"✅ Contributions saved to: {contrib_path}")
 
 
 # ==========================================
-# Example Run for Mexico City Grand Prix
+# Example Run for the upcoming race (config.py)
 # ==========================================
 if __name__ == "__main__":
     predict_winners(
-        model_path='models/final_xgb_model.pkl',
-        new_data_path='data/new_data.csv',
-        upcoming_race_id='2025_20',
-        grand_prix_name='Mexico City Grand Prix',
-        output_path='data/predictions.csv'
+        model_path=MODEL_PATH,
+        new_data_path=PREDICTION_INPUT_PATH,
+        upcoming_race_id=UPCOMING_RACE_ID,
+        grand_prix_name=UPCOMING_GRAND_PRIX,
+        output_path=PREDICTIONS_PATH,
+        explain=True
     )
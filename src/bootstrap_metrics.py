@@ -0,0 +1,120 @@
+"""
+bootstrap_metrics.py
+Race-level bootstrap confidence intervals for evaluation metrics.
+
+Races (not rows) are resampled with replacement, so drivers from the same
+race stay together. Each resample is represented by a vector of race counts,
+and every metric is computed for all resamples at once as weighted array
+operations:
+    - ROC_AUC          weighted Mann-Whitney statistic over tie groups
+    - Top{k}_Accuracy  share of actual top-k finishers found in the predicted
+                       top-k of their race (Top3 = the podium accuracy
+                       reported by final_evaluator)
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import N_BOOTSTRAP
+
+TOP_KS = (1, 3, 5)
+BATCH_SIZE = 256   # resamples per block, bounds the (resamples x rows) memory
+
+
+def race_bootstrap_counts(n_races, n_boot=N_BOOTSTRAP, seed=42):
+    """(n_boot, n_races) matrix: how many times each race appears in each resample."""
+    rng = np.random.default_rng(seed)
+    return rng.multinomial(n_races, np.full(n_races, 1 / n_races), size=n_boot)
+
+
+def weighted_roc_auc(y, scores, row_weights):
+    """ROC AUC for each row of row_weights (shape: resamples x rows); ties count one half."""
+    y = np.asarray(y).astype(bool)
+    order = np.argsort(scores, kind="mergesort")
+    sorted_scores = np.asarray(scores)[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+
+    w = np.atleast_2d(row_weights)[:, order].astype(np.float64)
+    y_sorted = y[order]
+    pos_w = np.add.reduceat(w * y_sorted, group_starts, axis=1)
+    neg_w = np.add.reduceat(w * ~y_sorted, group_starts, axis=1)
+
+    neg_below = np.cumsum(neg_w, axis=1) - neg_w
+    numerator = (pos_w * (neg_below + 0.5 * neg_w)).sum(axis=1)
+    denominator = pos_w.sum(axis=1) * neg_w.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return numerator / denominator
+
+
+def per_race_topk(race_idx, n_races, finish_position, scores, ks=TOP_KS):
+    """Per-race hit and target counts for each k (computed once, reused by every resample)."""
+    pred_rank = (
+        pd.Series(scores).groupby(race_idx).rank(ascending=False, method="first").to_numpy()
+    )
+    finish_position = np.asarray(finish_position)
+    stats = {}
+    for k in ks:
+        actual = finish_position <= k
+        hits = np.bincount(race_idx, weights=actual & (pred_rank <= k), minlength=n_races)
+        targets = np.bincount(race_idx, weights=actual, minlength=n_races)
+        stats[k] = (hits, targets)
+    return stats
+
+
+def metric_samples(race_ids, finish_position, y, scores, counts, ks=TOP_KS):
+    """Dict of metric -> values, one per row of counts (a race-count vector per resample)."""
+    race_idx, races = pd.factorize(pd.Series(race_ids))
+    counts = np.atleast_2d(counts)
+    samples = {"ROC_AUC": np.concatenate([
+        weighted_roc_auc(y, scores, block[:, race_idx])
+        for block in np.array_split(counts, max(1, len(counts) // BATCH_SIZE))
+    ])}
+    for k, (hits, targets) in per_race_topk(race_idx, len(races), finish_position, scores, ks).items():
+        with np.errstate(invalid="ignore", divide="ignore"):
+            samples[f"Top{k}_Accuracy"] = (counts @ hits) / (counts @ targets)
+    return samples
+
+
+def _prepare(race_ids, finish_position, y, n_boot, seed):
+    race_ids = np.asarray(race_ids)
+    n_races = len(pd.unique(race_ids))
+    return race_ids, np.asarray(finish_position), np.asarray(y).ravel(), \
+        np.ones((1, n_races), dtype=np.int64), race_bootstrap_counts(n_races, n_boot, seed)
+
+
+def bootstrap_metrics(race_ids, finish_position, y, scores, n_boot=N_BOOTSTRAP, ks=TOP_KS,
+                      alpha=0.05, seed=42):
+    """Point estimate + percentile confidence interval for every metric."""
+    race_ids, finish_position, y, full, counts = _prepare(race_ids, finish_position, y, n_boot, seed)
+    point = metric_samples(race_ids, finish_position, y, scores, full, ks)
+    boot = metric_samples(race_ids, finish_position, y, scores, counts, ks)
+
+    rows = []
+    for metric, values in boot.items():
+        low, high = np.nanpercentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+        rows.append({"Metric": metric, "Estimate": point[metric][0], "CI_Low": low,
+                     "CI_High": high, "Std_Error": np.nanstd(values)})
+    return pd.DataFrame(rows)
+
+
+def paired_bootstrap(race_ids, finish_position, y, scores_a, scores_b, n_boot=N_BOOTSTRAP,
+                     ks=TOP_KS, alpha=0.05, seed=42):
+    """
+    Compares two models on the same resamples (B - A).
+    P_Value is the two-sided share of resamples where the difference crosses zero.
+    """
+    race_ids, finish_position, y, full, counts = _prepare(race_ids, finish_position, y, n_boot, seed)
+    point_a = metric_samples(race_ids, finish_position, y, scores_a, full, ks)
+    point_b = metric_samples(race_ids, finish_position, y, scores_b, full, ks)
+    boot_a = metric_samples(race_ids, finish_position, y, scores_a, counts, ks)
+    boot_b = metric_samples(race_ids, finish_position, y, scores_b, counts, ks)
+
+    rows = []
+    for metric in boot_a:
+        diff = boot_b[metric] - boot_a[metric]
+        low, high = np.nanpercentile(diff, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+        p_value = min(1.0, 2 * min(np.nanmean(diff <= 0), np.nanmean(diff >= 0)))
+        rows.append({"Metric": metric, "Model_A": point_a[metric][0], "Model_B": point_b[metric][0],
+                     "Diff_B_minus_A": point_b[metric][0] - point_a[metric][0],
+                     "CI_Low": low, "CI_High": high, "P_Value": p_value})
+    return pd.DataFrame(rows)
@@ -0,0 +1,214 @@
+"""
+cli.py
+Single entry point for the whole pipeline:
+
+    python src/cli.py {fetch,features,prepare,tune,train,evaluate,compare,predict,replay} [options]
+
+Only the standard library and config are imported at startup; pandas,
+sklearn, xgboost and fastf1 are imported inside the subcommand that needs
+them, so `--help` and argument errors return instantly.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import config
+
+
+# ============================
+# Subcommands (heavy imports live inside each one)
+# ============================
+def cmd_fetch(args):
+    import data_fetcher
+    data_fetcher.START_YEAR, data_fetcher.END_YEAR = args.start_year, args.end_year
+    data_fetcher.main()
+
+
+def cmd_features(args):
+    import feature_engineering
+    feature_engineering.main()
+
+
+def cmd_prepare(args):
+    import data_preparation
+    data_preparation.main()
+
+
+def cmd_tune(args):
+    import model_trainer_hyperparameter
+    model_trainer_hyperparameter.main()
+
+
+def cmd_train(args):
+    import final_model_trainer
+    final_model_trainer.main(mode=args.mode)
+
+
+def cmd_evaluate(args):
+    import final_evaluator
+    final_evaluator.main(model_path=args.model, n_boot=args.bootstrap)
+
+
+def cmd_compare(args):
+    from model_comparison import compare_models
+    specs = [{"name": os.path.splitext(os.path.basename(path))[0], "model_path": path} for path in args.models]
+    leaderboard = compare_models(specs, n_boot=args.bootstrap)
+    print("\n🏆 Model Leaderboard:")
+    print(leaderboard.round(4).to_string())
+    if args.output:
+        leaderboard.to_csv(args.output, index_label="Rank")
+        print(f"\n📄 Saved leaderboard to: {args.output}")
+
+
+def cmd_predict(args):
+    if args.fetch_qualifying:
+        from upcomind_input_helper import fetch_upcoming_qualifying
+        fetch_upcoming_qualifying(
+            season=args.season,
+            grand_prix_name=args.grand_prix,
+            race_round=args.round,
+            output_path=args.qualifying,
+        )
+
+    from upcoming_data_fetcher import generate_prediction_input
+    from FINAL_PREDICTOR import predict_winners
+
+    generate_prediction_input(
+        processed_data_path=config.PROCESSED_DATA_PATH,
+        qualifying_data_path=args.qualifying,
+        x_train_path=os.path.join(config.DATA_DIR, "X_train.csv"),
+        upcoming_race_id=args.race_id,
+        upcoming_circuit_name=args.grand_prix,
+        output_path=config.PREDICTION_INPUT_PATH,
+    )
+    predict_winners(
+        model_path=args.model,
+        new_data_path=config.PREDICTION_INPUT_PATH,
+        upcoming_race_id=args.race_id,
+        grand_prix_name=args.grand_prix,
+        output_path=args.output,
+        explain=args.explain,
+    )
+
+
+def cmd_replay(args):
+    import pandas as pd
+    import race_replay
+    from identity_registry import IdentityRegistry
+
+    if args.train:
+        race_replay.train_inrace_model(model_path=args.model)
+
+    stored = race_replay.stored_race_ids()
+    if not stored:
+        print(f"❌ No stored lap tables in {config.LAPS_DIR} — run `fetch` with WRITE_LAPS first.")
+        return 1
+    race_id = args.race_id or stored[-1]
+    grid = race_replay.race_grid(race_id, pd.read_csv(config.RAW_DATA_PATH))["Grid_Position"]
+    laps = race_replay.load_race_laps(race_id)
+    replay = race_replay.RaceReplay(args.model)
+    names = IdentityRegistry().names("driver")
+
+    start = time.perf_counter()
+    if args.feed:
+        # Incremental: one update per feed chunk, printed as each leader lap completes
+        live = replay.live(grid, int(laps["LapNumber"].max()))
+        updates = []
+        for chunk in race_replay.replay_feed(laps, by=args.feed):
+            scored = live.update(chunk)
+            if scored is None:
+                continue
+            updates.append(scored)
+            for lap, lap_rows in scored.groupby("Lap"):
+                top = lap_rows.loc[lap_rows["Win_Probability"].idxmax()]
+                print(f"Lap {lap:>3}: {names.get(int(top.Driver_Code), top.Driver_Code)} "
+                      f"{top.Win_Probability:.3f}")
+        scored = pd.concat(updates, ignore_index=True)
+    else:
+        scored = replay.replay(laps, grid)
+    print(f"⏱️ Replayed {race_id}: {scored['Lap'].nunique()} laps x {len(grid)} drivers "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    scored.insert(2, "Driver", scored["Driver_Code"].map(names))
+    if not args.feed:
+        leaders = scored.loc[scored.groupby("Lap")["Win_Probability"].idxmax(), ["Lap", "Driver", "Win_Probability"]]
+        print(leaders.to_string(index=False))
+    if args.output:
+        scored.to_csv(args.output, index=False)
+        print(f"\n📄 Saved lap-by-lap probabilities to: {args.output}")
+
+
+# ============================
+# Argument parsing
+# ============================
+def build_parser():
+    parser = argparse.ArgumentParser(prog="f1-predictor", description="Formula 1 race predictor pipeline.")
+    parser.add_argument("--timing", action="store_true", help="print startup and run time for the subcommand")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fetch", help="fetch historical race + qualifying data (FastF1)")
+    p.add_argument("--start-year", type=int, default=config.START_YEAR)
+    p.add_argument("--end-year", type=int, default=config.END_YEAR)
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("features", help="build processed_data.csv from raw_data.csv")
+    p.set_defaults(func=cmd_features)
+
+    p = sub.add_parser("prepare", help="chronological train/val/test split + circuit encoding")
+    p.set_defaults(func=cmd_prepare)
+
+    p = sub.add_parser("tune", help="randomized hyperparameter search")
+    p.set_defaults(func=cmd_tune)
+
+    p = sub.add_parser("train", help="train and save the final model")
+    p.add_argument("--mode", choices=["in_memory", "external_memory"], default=config.TRAINING_MODE)
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("evaluate", help="ROC AUC + podium accuracy on the test split")
+    p.add_argument("--model", default=config.MODEL_PATH)
+    p.add_argument("--bootstrap", type=int, default=config.N_BOOTSTRAP, help="race-level resamples for confidence intervals (0 = off)")
+    p.set_defaults(func=cmd_evaluate)
+
+    p = sub.add_parser("compare", help="leaderboard of saved models on the shared test matrix")
+    p.add_argument("--models", nargs="+", default=[config.MODEL_PATH], help="saved model .pkl paths")
+    p.add_argument("--bootstrap", type=int, default=1000, help="race-level resamples for the ROC AUC CI")
+    p.add_argument("--output", default=os.path.join(config.DATA_DIR, "model_leaderboard.csv"))
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("predict", help="predict winners for the upcoming race")
+    p.add_argument("--model", default=config.MODEL_PATH)
+    p.add_argument("--qualifying", default=config.QUALIFYING_PATH, help="qualifying CSV (see README)")
+    p.add_argument("--fetch-qualifying", action="store_true", help="download qualifying results first")
+    p.add_argument("--season", type=int, default=config.UPCOMING_SEASON)
+    p.add_argument("--round", type=int, default=config.UPCOMING_ROUND)
+    p.add_argument("--race-id", default=config.UPCOMING_RACE_ID)
+    p.add_argument("--grand-prix", default=config.UPCOMING_GRAND_PRIX)
+    p.add_argument("--output", default=config.PREDICTIONS_PATH)
+    p.add_argument("--explain", action="store_true", help="show top contributing features per winner")
+    p.set_defaults(func=cmd_predict)
+
+    p = sub.add_parser("replay", help="lap-by-lap in-race win probabilities for a stored race")
+    p.add_argument("--race-id", default=None, help="stored race in data/laps (default: latest)")
+    p.add_argument("--model", default=config.INRACE_MODEL_PATH)
+    p.add_argument("--train", action="store_true", help="train the in-race model on all stored lap tables first")
+    p.add_argument("--feed", choices=["lap", "crossing"], default=None,
+                   help="replay incrementally from the local feed, one lap or one line crossing at a time")
+    p.add_argument("--output", default=os.path.join(config.DATA_DIR, "race_replay.csv"))
+    p.set_defaults(func=cmd_replay)
+
+    return parser
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    status = args.func(args)
+    if args.timing:
+        print(f"\n⏱️ {args.command} finished in {time.perf_counter() - start:.2f}s")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+config.py
+Single source of configuration for every pipeline stage.
+Standard library only, so importing it (and the CLI) stays instant.
+"""
+
+import os
+
+# ================= PATHS =================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+TELEMETRY_DIR = os.path.join(DATA_DIR, "telemetry")
+CHUNK_DIR = os.path.join(DATA_DIR, "chunks")
+LAPS_DIR = os.path.join(DATA_DIR, "laps")
+
+RAW_DATA_PATH = os.path.join(DATA_DIR, "raw_data.csv")
+PROCESSED_DATA_PATH = os.path.join(DATA_DIR, "processed_data.csv")
+MODEL_PATH = os.path.join(MODEL_DIR, "final_xgb_model.pkl")
+REGISTRY_PATH = os.path.join(DATA_DIR, "identity_registry.json")
+INRACE_MODEL_PATH = os.path.join(MODEL_DIR, "inrace_xgb_model.pkl")
+
+QUALIFYING_PATH = os.path.join(DATA_DIR, "upcoming_qualifying.csv")
+PREDICTION_INPUT_PATH = os.path.join(DATA_DIR, "new_data.csv")
+PREDICTIONS_PATH = os.path.join(DATA_DIR, "predictions.csv")
+# =========================================
+
+# ============ DATA COLLECTION ============
+START_YEAR = 2022
+END_YEAR = 2025
+MAX_RETRIES = 3
+WRITE_TELEMETRY = True
+WRITE_LAPS = True
+
+# ============ SPLITS & TRAINING ============
+# Chronological split of processed_data (≈1758 rows)
+TRAIN_END = 1200
+VAL_END = 1550
+RANDOM_STATE = 42
+# "in_memory" or "external_memory" (season chunks streamed through an XGBoost DataIter)
+TRAINING_MODE = "in_memory"
+
+# ============ EVALUATION ============
+N_BOOTSTRAP = 2000   # race-level resamples for confidence intervals
+
+# ============ UPCOMING RACE ============
+UPCOMING_SEASON = 2025
+UPCOMING_ROUND = 20
+UPCOMING_RACE_ID = f"{UPCOMING_SEASON}_{UPCOMING_ROUND}"
+UPCOMING_GRAND_PRIX = "Mexico City Grand Prix"
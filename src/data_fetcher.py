@@ -1,7 +1,7 @@
 """
 data_fetcher_combined.py
 Fetches Formula 1 race and qualifying data (2022 → latest race)
-and ensures 'Constructor_ID' feature is present in raw_data.csv
+with stable integer Driver_Code / Constructor_ID / Circuit_ID from the identity registry
 """
 
 import os
@@ -9,16 +9,14 @@ import time
 import pandas as pd
 from tqdm import tqdm
 import fastf1
-from fastf1 import plotting
-
-# Enable cache
-fastf1.Cache.enable_cache('E:/Projects/F1_predictor_samp/data/cache')
+from telemetry_store import write_session_telemetry
+from identity_registry import IdentityRegistry
+from lap_store import write_race_laps
+from config import (CACHE_DIR, RAW_DATA_PATH, TELEMETRY_DIR, LAPS_DIR, START_YEAR, END_YEAR, MAX_RETRIES,
+                    WRITE_TELEMETRY, WRITE_LAPS)
 
 # ============ CONFIG ============
-START_YEAR = 2022
-END_YEAR = 2025
-OUTPUT_PATH = "E:/Projects/F1_predictor_samp/data/raw_data.csv"
-MAX_RETRIES = 3
+OUTPUT_PATH = RAW_DATA_PATH
 # ================================
 
 
@@ -35,13 +33,14 @@ def get_session_data(year: int, gp_name: str, session_type: str):
     return None
 
 
-def collect_season_data(year: int):
+def collect_season_data(year: int, registry: IdentityRegistry):
     """Fetch all races and qualifying sessions for a given year."""
     results = []
     schedule = fastf1.get_event_schedule(year, include_testing=False)
 
     for _, event in tqdm(schedule.iterrows(), total=len(schedule), desc=f"{year} Season Progress"):
         gp_name = event["EventName"]
+        circuit_id = registry.register("circuit", event["Location"], name=gp_name, aliases=[gp_name])
 
         race_session = get_session_data(year, gp_name, "R")
         qual_session = get_session_data(year, gp_name, "Q")
@@ -53,21 +52,9 @@ def collect_season_data(year: int):
         # --------------------- Qualifying Data ---------------------
         qual_results = qual_session.results
         if qual_results is not None:
-            qual_cols = ["DriverNumber", "Abbreviation", "TeamName", "Position", "Q1", "Q2", "Q3"]
-            if "TeamId" in qual_results.columns:
-                qual_cols.append("TeamId")
-
-            qual_df = qual_results[qual_cols].copy()
-            qual_df.rename(
-                columns={
-                    "DriverNumber": "Driver_ID",
-                    "Abbreviation": "Driver",
-                    "TeamName": "Constructor",
-                    "TeamId": "Constructor_ID",
-                    "Position": "Grid_Position",
-                },
-                inplace=True,
-            )
+            qual_df = qual_results[["Position", "Q1", "Q2", "Q3"]].copy()
+            qual_df.rename(columns={"Position": "Grid_Position"}, inplace=True)
+            qual_df["Driver_Code"] = registry.register_drivers(qual_results, year)
             # Fastest Q time
             qual_df["Qualifying_Time"] = qual_df[["Q1", "Q2", "Q3"]].min(axis=1, skipna=True)
         else:
@@ -80,70 +67,83 @@ def collect_season_data(year: int):
             print(f"   ⚠️ No race results found for {gp_name}")
             continue
 
-        race_cols = ["DriverNumber", "Abbreviation", "TeamName", "Position", "Status"]
-        if "TeamId" in race_results.columns:
-            race_cols.append("TeamId")
-
-        race_df = race_results[race_cols].copy()
+        race_df = race_results[["DriverNumber", "Abbreviation", "TeamName", "Position", "Status"]].copy()
         race_df.rename(
             columns={
                 "DriverNumber": "Driver_ID",
                 "Abbreviation": "Driver",
                 "TeamName": "Constructor",
-                "TeamId": "Constructor_ID",
                 "Position": "Finish_Position",
             },
             inplace=True,
         )
+        race_df["Driver_Code"] = registry.register_drivers(race_results, year)
+        team_keys = race_results["TeamId"] if "TeamId" in race_results.columns else race_results["TeamName"]
+        race_df["Constructor_ID"] = registry.encode("constructor", team_keys, names=race_results["TeamName"])
+
+        # Lap rows carry the abbreviation -> this event's driver codes
+        try:
+            laps = race_session.laps.copy()
+            laps["Driver_Code"] = laps["Driver"].map(dict(zip(race_df["Driver"], race_df["Driver_Code"])))
+        except Exception:
+            laps = pd.DataFrame(columns=["Driver_Code", "LapTime", "PitInTime", "PitOutTime"])
 
         # Fastest lap time per driver
         try:
-            laps = race_session.laps
             fastest_laps = (
-                laps.groupby("Driver")["LapTime"]
+                laps.groupby("Driver_Code")["LapTime"]
                 .min()
                 .reset_index()
                 .rename(columns={"LapTime": "Fastest_Lap_Time"})
             )
         except Exception:
-            fastest_laps = pd.DataFrame(columns=["Driver", "Fastest_Lap_Time"])
+            fastest_laps = pd.DataFrame(columns=["Driver_Code", "Fastest_Lap_Time"])
 
         # ✅ PIT STOP SECTION
         try:
-            pitstops = race_session.laps[
-                race_session.laps["PitInTime"].notna() & race_session.laps["PitOutTime"].notna()
-            ]
+            pitstops = laps[laps["PitInTime"].notna() & laps["PitOutTime"].notna()]
             if not pitstops.empty:
                 pit_times = (
-                    pitstops.groupby("Driver")
-                    .apply(lambda df: (df["PitOutTime"] - df["PitInTime"]).dt.total_seconds().min())
+                    pitstops.assign(
+                        Pit_Stop_Duration=(pitstops["PitOutTime"] - pitstops["PitInTime"]).dt.total_seconds()
+                    )
+                    .groupby("Driver_Code")["Pit_Stop_Duration"]
+                    .min()
                     .reset_index()
-                    .rename(columns={0: "Pit_Stop_Duration"})
                 )
             else:
-                pit_times = pd.DataFrame(columns=["Driver", "Pit_Stop_Duration"])
+                pit_times = pd.DataFrame(columns=["Driver_Code", "Pit_Stop_Duration"])
         except Exception:
-            pit_times = pd.DataFrame(columns=["Driver", "Pit_Stop_Duration"])
+            pit_times = pd.DataFrame(columns=["Driver_Code", "Pit_Stop_Duration"])
 
-        # --------------------- Merge Data ---------------------
+        # --------------------- Merge Data (integer keys) ---------------------
         merged = (
             race_df.merge(
-                qual_df[["Driver", "Grid_Position", "Qualifying_Time", "Constructor_ID"]],
-                on="Driver",
+                qual_df[["Driver_Code", "Grid_Position", "Qualifying_Time"]],
+                on="Driver_Code",
                 how="left",
             )
-            .merge(fastest_laps, on="Driver", how="left")
-            .merge(pit_times, on="Driver", how="left")
+            .merge(fastest_laps, on="Driver_Code", how="left")
+            .merge(pit_times, on="Driver_Code", how="left")
         )
 
-        # Fallback: if Constructor_ID missing, assign numeric mapping
-        if "Constructor_ID" not in merged.columns or merged["Constructor_ID"].isna().all():
-            merged["Constructor_ID"] = merged["Constructor"].factorize()[0] + 1
-
         merged["Season"] = year
         merged["Circuit_Name"] = gp_name
+        merged["Circuit_ID"] = circuit_id
         merged["Race_ID"] = f"{year}_{event['RoundNumber']}"
 
+        # Qualifying telemetry -> memory-mapped store (joined in feature_engineering)
+        if WRITE_TELEMETRY:
+            driver_codes = dict(zip(qual_results["DriverNumber"].astype(str), qual_df["Driver_Code"]))
+            write_session_telemetry(qual_session, merged["Race_ID"].iloc[0], TELEMETRY_DIR, driver_codes)
+
+        # Race lap table -> data/laps (in-race replay in race_replay.py)
+        if WRITE_LAPS:
+            try:
+                write_race_laps(laps, merged["Race_ID"].iloc[0], LAPS_DIR)
+            except Exception as e:
+                print(f"   ⚠️ No lap table for {gp_name}: {e}")
+
         results.append(merged)
 
     if results:
@@ -152,32 +152,19 @@ def collect_season_data(year: int):
         return pd.DataFrame()
 
 
-def ensure_constructor_id(csv_path: str):
-    """Ensures the dataset has a proper 'Constructor_ID' column."""
-    if not os.path.exists(csv_path):
-        print(f"❌ File not found: {csv_path}")
-        return
-
-    df = pd.read_csv(csv_path)
-
-    if "Constructor" not in df.columns:
-        raise ValueError("❌ 'Constructor' column not found in the dataset.")
-
-    if "Constructor_ID" not in df.columns:
-        df["Constructor_ID"] = df["Constructor"].astype("category").cat.codes + 1
-        df.to_csv(csv_path, index=False)
-        print(f"✅ Added 'Constructor_ID' column successfully and updated {csv_path}")
-    else:
-        print("ℹ️ 'Constructor_ID' already exists — no changes made.")
-
-
 def main():
+    # Enable cache
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fastf1.Cache.enable_cache(CACHE_DIR)
+
+    registry = IdentityRegistry()
     all_data = []
     for year in range(START_YEAR, END_YEAR + 1):
         print(f"\n========== Fetching {year} Season ==========")
-        season_df = collect_season_data(year)
+        season_df = collect_season_data(year, registry)
         if not season_df.empty:
             all_data.append(season_df)
+        registry.save()
 
     if not all_data:
         print("❌ No data fetched.")
@@ -187,9 +174,7 @@ def main():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
     final_df.to_csv(OUTPUT_PATH, index=False)
     print(f"\n✅ Data collection complete! Saved to {OUTPUT_PATH}")
-
-    # Ensure Constructor_ID column exists
-    ensure_constructor_id(OUTPUT_PATH)
+    print(f"📇 Identity registry: {registry.path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+"""
+explainer.py
+Feature-contribution explanations using XGBoost's native pred_contribs
+(exact TreeSHAP values, computed for a whole matrix in one call).
+
+Contributions are in log-odds: each row's values (incl. Bias) sum to the
+model margin, so the win probability is sigmoid(row sum) and comes for free.
+Results are cached on disk per (model hash, feature-row hash).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import joblib
+import xgboost as xgb
+
+from scenario_predictor import align_features, model_hash
+from config import DATA_DIR, MODEL_PATH, CACHE_DIR
+
+EXPLANATION_CACHE_DIR = os.path.join(CACHE_DIR, "explanations")
+
+
+def contributions(model, X):
+    """Per-feature contributions (log-odds) for every row of X, plus Bias and Win_Probability."""
+    contribs = model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+    out = pd.DataFrame(contribs, columns=list(X.columns) + ["Bias"], index=X.index)
+    out["Win_Probability"] = 1 / (1 + np.exp(-contribs.sum(axis=1)))
+    return out
+
+
+def group_circuit_columns(contribs):
+    """Collapses the one-hot Circuit_Name_* contributions into a single Circuit_Name column."""
+    circuit_cols = [c for c in contribs.columns if c.startswith("Circuit_Name_")]
+    if not circuit_cols:
+        return contribs
+    grouped = contribs.drop(columns=circuit_cols)
+    grouped.insert(len(grouped.columns) - 2, "Circuit_Name", contribs[circuit_cols].sum(axis=1))
+    return grouped
+
+
+class ExplanationCache:
+    """On-disk cache of contribution rows for one model, keyed by feature-row hash."""
+
+    def __init__(self, model, cache_dir=EXPLANATION_CACHE_DIR):
+        self.model = model
+        self.features = model.get_booster().feature_names
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{model_hash(model)}.npz")
+        if os.path.exists(self.path):
+            with np.load(self.path) as npz:
+                self._keys, self._values = npz["row_keys"], npz["contribs"]
+        else:
+            self._keys = np.array([], dtype=np.uint64)
+            self._values = np.empty((0, len(self.features) + 2))
+
+    def explain(self, X):
+        """Contributions for X, computing only rows not already cached (one batched call)."""
+        X = align_features(X, self.features)
+        row_keys = pd.util.hash_pandas_object(X, index=False).to_numpy()
+        pos = pd.Index(self._keys).get_indexer(row_keys)
+        missing = pos == -1
+
+        if missing.any():
+            new_keys, first = np.unique(row_keys[missing], return_index=True)
+            new_rows = contributions(self.model, X.iloc[np.flatnonzero(missing)[first]])
+            self._keys = np.concatenate([self._keys, new_keys])
+            self._values = np.vstack([self._values, new_rows.to_numpy()])
+            np.savez(self.path, row_keys=self._keys, contribs=self._values)
+            pos = pd.Index(self._keys).get_indexer(row_keys)
+
+        print(f"🧠 Explanations: {(~missing).sum()} cached, {missing.sum()} computed")
+        return pd.DataFrame(
+            self._values[pos], columns=self.features + ["Bias", "Win_Probability"], index=X.index
+        )
+
+
+def aggregate(contribs, meta, by):
+    """Mean contribution of every feature, grouped by a metadata column (Driver, Constructor, Circuit_Name...)."""
+    grouped = group_circuit_columns(contribs)
+    return grouped.groupby(meta[by].to_numpy()).mean().rename_axis(by)
+
+
+def top_features(contribs, n=3):
+    """The n features pushing each row's prediction the most (by absolute contribution)."""
+    values = group_circuit_columns(contribs).drop(columns=["Bias", "Win_Probability"])
+    order = np.argsort(-np.abs(values.to_numpy()), axis=1)[:, :n]
+    names = values.columns.to_numpy()[order]
+    signed = np.take_along_axis(values.to_numpy(), order, axis=1)
+    return [
+        ", ".join(f"{name} {val:+.2f}" for name, val in zip(row_names, row_vals))
+        for row_names, row_vals in zip(names, signed)
+    ]
+
+
+def explain_backtest(model_path=MODEL_PATH, data_dir=DATA_DIR):
+    """Explains the whole test split at once and aggregates by driver, constructor and circuit."""
+    model = joblib.load(model_path)
+    X_test = pd.read_csv(os.path.join(data_dir, "X_test.csv"))
+    # Written by data_preparation in X_test row order
+    meta = pd.read_csv(os.path.join(data_dir, "meta_test.csv"))[["Driver", "Constructor", "Circuit_Name", "Race_ID"]]
+    if len(meta) != len(X_test):
+        raise ValueError("❌ meta_test.csv does not match X_test.csv — rerun data_preparation.py.")
+
+    contribs = ExplanationCache(model).explain(X_test)
+
+    summaries = {by: aggregate(contribs, meta, by) for by in ["Driver", "Constructor", "Circuit_Name"]}
+    output_path = os.path.join(data_dir, "test_contributions.csv")
+    pd.concat([meta, contribs], axis=1).to_csv(output_path, index=False)
+    print(f"📄 Saved per-row contributions to: {output_path}")
+    return contribs, summaries
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    _, summaries = explain_backtest()
+    print(f"⏱️ Explained test split in {time.perf_counter() - start:.2f}s")
+
+    for by, summary in summaries.items():
+        print(f"\n📊 Mean contributions by {by} (top 5 by win probability):")
+        print(summary.nlargest(5, "Win_Probability").round(3).to_string())
@@ -7,17 +7,14 @@ Output -> data/processed_data.csv
 import os
 import pandas as pd
 import numpy as np
-
-# ================= PATHS =================
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-RAW_PATH = os.path.join(BASE_DIR, "data", "raw_data.csv")
-PROCESSED_PATH = os.path.join(BASE_DIR, "data", "processed_data.csv")
-# =========================================
+from telemetry_store import add_telemetry_features
+from identity_registry import IdentityRegistry
+from config import RAW_DATA_PATH as RAW_PATH, PROCESSED_DATA_PATH as PROCESSED_PATH, TELEMETRY_DIR
 
 
 def compute_driver_features(df):
-    df = df.sort_values(["Driver", "Season", "Race_ID"])
-    grouped = df.groupby("Driver", group_keys=False)
+    df = df.sort_values(["Driver_Code", "Season", "Race_ID"])
+    grouped = df.groupby("Driver_Code", group_keys=False)
 
     # Average Finish Position (Last 5)
     df["Avg_Finish_Position_L5"] = (
@@ -44,8 +41,8 @@ def compute_driver_features(df):
     # Track Specialization Index (mean deviation on track)
     df["Track_Specialization_Index_L22"] = (
         grouped.apply(
-            lambda g: g.set_index("Circuit_Name")
-            .groupby("Circuit_Name")["Finish_Position"]
+            lambda g: g.set_index("Circuit_ID")
+            .groupby("Circuit_ID")["Finish_Position"]
             .transform(lambda x: (x - x.mean()).rolling(22, min_periods=1).mean())
         )
         .reset_index(level=0, drop=True)
@@ -100,6 +97,11 @@ def main():
     print("📂 Loading raw data...")
     df = pd.read_csv(RAW_PATH)
 
+    # Integer identity codes (backfills raw data fetched before the registry existed)
+    registry = IdentityRegistry()
+    df = registry.add_codes(df)
+    registry.save()
+
     # Convert times properly
     for col in ["Fastest_Lap_Time", "Qualifying_Time"]:
         df[col] = pd.to_timedelta(df[col], errors="coerce")
@@ -114,6 +116,9 @@ def main():
     print("⚙️ Computing race context features...")
     df = compute_race_context(df)
 
+    print("⚙️ Joining qualifying telemetry features...")
+    df = add_telemetry_features(df, TELEMETRY_DIR)
+
     # Cleanup temporary columns
     df.drop(columns=["Racecraft_Score", "Team_Avg_Lap", "Car_Pace_Delta", "Reliability_Binary"], inplace=True, errors="ignore")
 
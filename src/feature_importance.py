@@ -0,0 +1,196 @@
+"""
+feature_importance.py
+Permutation importance and feature-ablation for models from final_model_trainer.
+
+Permutation: every (feature group, repeat) copy of the test matrix is
+stacked into one array and scored with a few large predict calls; ROC AUC
+and podium accuracy are then computed for all copies at once.
+
+Ablation: the model is retrained without each feature group (same
+hyperparameters, fixed seed) across a process pool sharing train/test
+matrices read-only, and scored against a retrained full-feature baseline.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import joblib
+from xgboost import XGBClassifier
+
+from config import DATA_DIR, MODEL_PATH, RANDOM_STATE
+from scenario_predictor import align_features
+from parallel_search import SharedMatrix, attach_shared, plan_cores
+from model_comparison import load_comparison_data
+
+N_REPEATS = 10
+BATCH_ROWS = 500_000   # rows per predict call when scoring stacked copies
+
+
+def feature_groups(columns, group_circuits=True):
+    """One group per feature; Circuit_Name_* one-hots optionally form a single group."""
+    groups = {}
+    for col in columns:
+        key = "Circuit_Name" if group_circuits and col.startswith("Circuit_Name_") else col
+        groups.setdefault(key, []).append(col)
+    return groups
+
+
+# ============================
+# Vectorized metrics over many score vectors
+# ============================
+def roc_auc_rows(y, scores):
+    """ROC AUC for every row of scores (copies x rows), via average ranks."""
+    y = np.asarray(y).astype(bool)
+    ranks = pd.DataFrame(scores).rank(axis=1).to_numpy()
+    n_pos, n_neg = y.sum(), (~y).sum()
+    return (ranks[:, y].sum(axis=1) - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def topk_accuracy_rows(race_idx, finish_position, scores, k=3):
+    """Share of actual top-k finishers found in each race's predicted top-k, for every row of scores."""
+    race_idx = np.asarray(race_idx)
+    order = np.lexsort((-scores, np.broadcast_to(race_idx, scores.shape)), axis=-1)
+    race_sorted = race_idx[order]
+    race_start = np.searchsorted(race_idx[np.argsort(race_idx, kind="stable")], race_sorted)
+    pred_topk = (np.arange(scores.shape[1]) - race_start) < k
+    actual_topk = np.asarray(finish_position)[order] <= k
+    return (pred_topk & actual_topk).sum(axis=1) / (np.asarray(finish_position) <= k).sum()
+
+
+# ============================
+# Permutation importance
+# ============================
+def permutation_importance(model, X_test, y_test, meta, n_repeats=N_REPEATS, group_circuits=False,
+                           seed=RANDOM_STATE):
+    """Mean/std drop in ROC AUC and podium accuracy when each feature group is shuffled."""
+    features = model.get_booster().feature_names
+    X = align_features(X_test, features).to_numpy(dtype=np.float32)
+    y = np.asarray(y_test).ravel()
+    race_idx = pd.factorize(meta["Race_ID"])[0]
+    finish = meta["Finish_Position"].to_numpy()
+    groups = feature_groups(features, group_circuits)
+    n_rows, n_copies = len(X), len(groups) * n_repeats
+
+    # Stack every permuted copy: (groups * repeats, rows, features)
+    rng = np.random.default_rng(seed)
+    perms = np.argsort(rng.random((n_repeats, n_rows)), axis=1)
+    stacked = np.broadcast_to(X, (n_copies, n_rows, X.shape[1])).copy()
+    for g, cols in enumerate(groups.values()):
+        col_idx = [features.index(c) for c in cols]
+        stacked[g * n_repeats:(g + 1) * n_repeats][:, :, col_idx] = X[perms][:, :, col_idx]
+
+    start = time.perf_counter()
+    flat = stacked.reshape(-1, X.shape[1])
+    scores = np.concatenate([
+        model.predict_proba(pd.DataFrame(flat[i:i + BATCH_ROWS], columns=features))[:, 1]
+        for i in range(0, len(flat), BATCH_ROWS)
+    ]).reshape(n_copies, n_rows)
+    print(f"⏱️ Scored {n_copies} permuted copies ({len(flat)} rows) in {time.perf_counter() - start:.2f}s")
+
+    base = model.predict_proba(pd.DataFrame(X, columns=features))[:, 1][None, :]
+    base_auc = roc_auc_rows(y, base)[0]
+    base_podium = topk_accuracy_rows(race_idx, finish, base)[0]
+    auc_drop = (base_auc - roc_auc_rows(y, scores)).reshape(len(groups), n_repeats)
+    podium_drop = (base_podium - topk_accuracy_rows(race_idx, finish, scores)).reshape(len(groups), n_repeats)
+
+    result = pd.DataFrame({
+        "Feature": list(groups),
+        "AUC_Drop_Mean": auc_drop.mean(axis=1),
+        "AUC_Drop_Std": auc_drop.std(axis=1),
+        "Podium_Drop_Mean": podium_drop.mean(axis=1),
+        "Podium_Drop_Std": podium_drop.std(axis=1),
+    })
+    return result.sort_values("AUC_Drop_Mean", ascending=False).reset_index(drop=True)
+
+
+# ============================
+# Ablation retrains
+# ============================
+_worker = {}
+
+
+def _attach(train_spec, y_spec, test_spec, columns, n_threads):
+    _worker["X_train"], _worker["train_shm"] = attach_shared(train_spec)
+    _worker["y_train"], _worker["y_shm"] = attach_shared(y_spec)
+    _worker["X_test"], _worker["test_shm"] = attach_shared(test_spec)
+    _worker["columns"] = columns
+    _worker["n_threads"] = n_threads
+
+
+def _retrain_without(task):
+    """Retrains with one feature group removed and returns its test-set probabilities."""
+    name, dropped, params = task
+    keep = [i for i, c in enumerate(_worker["columns"]) if c not in dropped]
+    kept_cols = [_worker["columns"][i] for i in keep]
+    model = XGBClassifier(**params, n_jobs=_worker["n_threads"])
+    model.fit(pd.DataFrame(_worker["X_train"][:, keep], columns=kept_cols), _worker["y_train"])
+    probs = model.predict_proba(pd.DataFrame(_worker["X_test"][:, keep], columns=kept_cols))[:, 1]
+    return name, probs
+
+
+def ablation(model, X_train, y_train, X_test, y_test, meta, group_circuits=True, total_cores=None):
+    """Retrains once per dropped feature group (plus a full baseline) in parallel."""
+    features = model.get_booster().feature_names
+    # feature_types/feature_names describe the full column set (load_model sets them) — not valid once a group is dropped
+    skip = {"n_jobs", "feature_types", "feature_names"}
+    params = {k: v for k, v in model.get_params().items() if v is not None and k not in skip}
+    params["random_state"] = params.get("random_state", RANDOM_STATE)
+    groups = feature_groups(features, group_circuits)
+    tasks = [("(none)", [], params)] + [(name, cols, params) for name, cols in groups.items()]
+
+    workers, threads = plan_cores(len(tasks), total_cores)
+    print(f"🧮 {len(tasks)} ablation retrains on {workers} worker(s) x {threads} xgb thread(s)")
+    shared = [
+        SharedMatrix(align_features(X_train, features).to_numpy()),
+        SharedMatrix(np.asarray(y_train).ravel()),
+        SharedMatrix(align_features(X_test, features).to_numpy()),
+    ]
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(shared[0].spec, shared[1].spec, shared[2].spec, features, threads),
+        ) as pool:
+            results = dict(pool.map(_retrain_without, tasks))
+    finally:
+        for matrix in shared:
+            matrix.close()
+    print(f"⏱️ Ablation finished in {time.perf_counter() - start:.1f}s")
+
+    y = np.asarray(y_test).ravel()
+    race_idx = pd.factorize(meta["Race_ID"])[0]
+    finish = meta["Finish_Position"].to_numpy()
+    names = list(results)
+    scores = np.vstack([results[n] for n in names])
+    auc = roc_auc_rows(y, scores)
+    podium = topk_accuracy_rows(race_idx, finish, scores)
+
+    result = pd.DataFrame({
+        "Dropped": names,
+        "ROC_AUC": auc,
+        "AUC_Change": auc - auc[0],
+        "Podium_Accuracy": podium,
+        "Podium_Change": podium - podium[0],
+    })
+    return result.sort_values("AUC_Change").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    model = joblib.load(MODEL_PATH)
+    X_test, y_test, meta, X_train, y_train = load_comparison_data(DATA_DIR, need_train=True)
+
+    print("🔀 Permutation importance...")
+    importance = permutation_importance(model, X_test, y_test, meta)
+    print(importance.round(4).to_string(index=False))
+
+    print("\n✂️ Feature ablation...")
+    ablated = ablation(model, X_train, y_train, X_test, y_test, meta)
+    print(ablated.round(4).to_string(index=False))
+
+    importance.to_csv(os.path.join(DATA_DIR, "permutation_importance.csv"), index=False)
+    ablated.to_csv(os.path.join(DATA_DIR, "feature_ablation.csv"), index=False)
+    print(f"\n📄 Saved permutation_importance.csv and feature_ablation.csv to {DATA_DIR}")
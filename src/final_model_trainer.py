@@ -1,42 +1,25 @@
 import pandas as pd
 import os
+import glob
+import time
 import joblib
+import xgboost as xgb
 from xgboost import XGBClassifier
 from sklearn.metrics import roc_auc_score, classification_report
+from config import DATA_DIR, MODEL_DIR, CACHE_DIR, CHUNK_DIR, RANDOM_STATE, TRAINING_MODE
 
 # ============================
-# 1. Paths
+# 1. Paths & Config
 # ============================
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DATA_PATH = os.path.join(BASE_DIR, "data")
-MODEL_PATH = os.path.join(BASE_DIR, "models")
+DATA_PATH = DATA_DIR
+MODEL_PATH = MODEL_DIR
 
-os.makedirs(MODEL_PATH, exist_ok=True)
+# TRAINING_MODE (config.py): "in_memory" loads X_train/X_val into pandas (race-level rows).
+# "external_memory" streams season-partitioned chunks from CHUNK_DIR
+# through an XGBoost DataIter, so lap/stint-level data never has to fit in RAM.
+CHUNK_ROWS = 100_000
+CACHE_PREFIX = os.path.join(CACHE_DIR, "xgb_extmem")
 
-# ============================
-# 2. Load the train/val/test splits
-# ============================
-X_train = pd.read_csv(os.path.join(DATA_PATH, "X_train.csv"))
-y_train = pd.read_csv(os.path.join(DATA_PATH, "y_train.csv"))
-X_val = pd.read_csv(os.path.join(DATA_PATH, "X_val.csv"))
-y_val = pd.read_csv(os.path.join(DATA_PATH, "y_val.csv"))
-X_test = pd.read_csv(os.path.join(DATA_PATH, "X_test.csv"))
-y_test = pd.read_csv(os.path.join(DATA_PATH, "y_test.csv"))
-
-print(f"✅ Loaded training/validation/test data successfully.")
-print(f"Train: {X_train.shape}, Val: {X_val.shape}, Test: {X_test.shape}")
-
-# ============================
-# 3. Combine Train + Validation sets
-# ============================
-X_final_train = pd.concat([X_train, X_val], axis=0).reset_index(drop=True)
-y_final_train = pd.concat([y_train, y_val], axis=0).reset_index(drop=True)
-
-print(f"📘 Final training set size: {X_final_train.shape[0]} rows")
-
-# ============================
-# 4. Initialize Final XGBoost Model
-# ============================
 best_params = {
     'subsample': 0.7,
     'reg_lambda': 1,
@@ -46,39 +29,190 @@ best_params = {
     'learning_rate': 0.01,
     'gamma': 0,
     'colsample_bytree': 0.7,
-    'random_state': 42,
+    'random_state': RANDOM_STATE,
     'use_label_encoder': False,
     'eval_metric': 'logloss'
 }
 
-final_model = XGBClassifier(**best_params)
 
 # ============================
-# 5. Train on Combined Data
+# 2. Season Chunk Iterator
 # ============================
-print("🚀 Training final model...")
-final_model.fit(X_final_train, y_final_train)
+class SeasonChunkIter(xgb.DataIter):
+    """Streams X_<season>.csv / y_<season>.csv pairs in CHUNK_ROWS pieces."""
+
+    def __init__(self, chunk_dir, chunk_rows=CHUNK_ROWS, cache_prefix=None):
+        cache_prefix = cache_prefix or CACHE_PREFIX
+        x_files = sorted(glob.glob(os.path.join(chunk_dir, "X_*.csv")))
+        self._pairs = []
+        for x_file in x_files:
+            season = os.path.basename(x_file)[2:-4]
+            y_file = os.path.join(chunk_dir, f"y_{season}.csv")
+            if os.path.exists(y_file):
+                self._pairs.append((x_file, y_file))
+        if not self._pairs:
+            raise FileNotFoundError(f"❌ No season chunks (X_<season>.csv + y_<season>.csv) found in {chunk_dir}")
+
+        self._chunk_rows = chunk_rows
+        self._readers = None
+        self._pair_idx = 0
+        self.rows_seen = 0
+        self.cache_prefix = cache_prefix
+        os.makedirs(os.path.dirname(cache_prefix), exist_ok=True)
+        super().__init__(cache_prefix=cache_prefix)
+
+    def _open(self, idx):
+        x_file, y_file = self._pairs[idx]
+        return (
+            pd.read_csv(x_file, chunksize=self._chunk_rows),
+            pd.read_csv(y_file, chunksize=self._chunk_rows),
+        )
+
+    def next(self, input_data):
+        while self._pair_idx < len(self._pairs):
+            if self._readers is None:
+                self._readers = self._open(self._pair_idx)
+            try:
+                X_chunk = next(self._readers[0])
+                y_chunk = next(self._readers[1])
+            except StopIteration:
+                self._close_readers()
+                self._pair_idx += 1
+                continue
+            self.rows_seen += len(X_chunk)
+            input_data(data=X_chunk, label=y_chunk.squeeze("columns"))
+            return True
+        return False
+
+    def _close_readers(self):
+        if self._readers is not None:
+            for reader in self._readers:
+                reader.close()
+            self._readers = None
+
+    def reset(self):
+        self._close_readers()
+        self._pair_idx = 0
+
+
+def to_native_params(params):
+    """Translate the sklearn-style best_params into xgb.train arguments."""
+    native = {k: v for k, v in params.items() if k not in ("n_estimators", "random_state", "use_label_encoder")}
+    native["objective"] = "binary:logistic"
+    native["tree_method"] = "hist"
+    native["seed"] = params.get("random_state", 0)
+    return native, params.get("n_estimators", 100)
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return peak / 1024 ** 2 if os.uname().sysname == "Darwin" else peak / 1024
 
-print("✅ Final model training completed.")
 
 # ============================
-# 6. Evaluate on Test Set
+# 3. Training Modes
 # ============================
-y_pred_proba = final_model.predict_proba(X_test)[:, 1]
-y_pred = final_model.predict(X_test)
+def load_splits():
+    X_train = pd.read_csv(os.path.join(DATA_PATH, "X_train.csv"))
+    y_train = pd.read_csv(os.path.join(DATA_PATH, "y_train.csv"))
+    X_val = pd.read_csv(os.path.join(DATA_PATH, "X_val.csv"))
+    y_val = pd.read_csv(os.path.join(DATA_PATH, "y_val.csv"))
+    X_test = pd.read_csv(os.path.join(DATA_PATH, "X_test.csv"))
+    y_test = pd.read_csv(os.path.join(DATA_PATH, "y_test.csv"))
+
+    print(f"✅ Loaded training/validation/test data successfully.")
+    print(f"Train: {X_train.shape}, Val: {X_val.shape}, Test: {X_test.shape}")
+    return X_train, y_train, X_val, y_val, X_test, y_test
+
+
+def train_in_memory(X_train, y_train, X_val, y_val, params=best_params):
+    """Combine Train + Validation sets and fit XGBClassifier on them."""
+    X_final_train = pd.concat([X_train, X_val], axis=0).reset_index(drop=True)
+    y_final_train = pd.concat([y_train, y_val], axis=0).reset_index(drop=True)
+
+    print(f"📘 Final training set size: {X_final_train.shape[0]} rows")
+    print("🚀 Training final model...")
+    final_model = XGBClassifier(**params)
+    final_model.fit(X_final_train, y_final_train)
+    return final_model
+
+
+def train_external_memory(chunk_dir=CHUNK_DIR, params=best_params, chunk_rows=CHUNK_ROWS, cache_prefix=None):
+    """
+    Trains on season-partitioned chunks without loading them all at once.
+    Returns an XGBClassifier so the evaluator and predictor work unchanged.
+    The DMatrix cache and the intermediate booster file both live under cache_prefix.
+    """
+    cache_prefix = cache_prefix or CACHE_PREFIX
+    native_params, num_boost_round = to_native_params(params)
+    chunk_iter = SeasonChunkIter(chunk_dir, chunk_rows=chunk_rows, cache_prefix=cache_prefix)
+    print(f"📦 Streaming {len(chunk_iter._pairs)} season chunk(s) from {chunk_dir}")
+
+    start = time.perf_counter()
+    dtrain = xgb.ExtMemQuantileDMatrix(chunk_iter)
+    build_secs = time.perf_counter() - start
+    rows = dtrain.num_row()
+
+    print("🚀 Training final model (external memory)...")
+    start = time.perf_counter()
+    booster = xgb.train(native_params, dtrain, num_boost_round=num_boost_round)
+    train_secs = time.perf_counter() - start
+
+    peak = peak_memory_mb()
+    print(f"📘 Final training set size: {rows} rows")
+    print(f"⏱️ DMatrix build: {build_secs:.1f}s ({rows / max(build_secs, 1e-9):,.0f} rows/s)")
+    print(f"⏱️ Training: {train_secs:.1f}s ({rows * num_boost_round / max(train_secs, 1e-9):,.0f} row-rounds/s)")
+    if peak is not None:
+        print(f"💾 Peak RSS: {peak:,.0f} MB")
+
+    # Wrap the booster in the sklearn API via its saved JSON form
+    booster_path = cache_prefix + "_booster.json"
+    booster.save_model(booster_path)
+    final_model = XGBClassifier(**params)
+    final_model.load_model(booster_path)
+    return final_model
 
-roc_auc = roc_auc_score(y_test, y_pred_proba)
-print(f"\n🎯 Test ROC AUC: {roc_auc:.4f}\n")
-print("Classification Report:")
-print(classification_report(y_test, y_pred))
 
 # ============================
-# 7. Save Final Model
+# 4. Evaluate & Save
 # ============================
-save_dir = os.path.join(BASE_DIR, "models")
-os.makedirs(save_dir, exist_ok=True)
+def evaluate(final_model, X_test, y_test):
+    y_pred_proba = final_model.predict_proba(X_test)[:, 1]
+    y_pred = final_model.predict(X_test)
+
+    roc_auc = roc_auc_score(y_test, y_pred_proba)
+    print(f"\n🎯 Test ROC AUC: {roc_auc:.4f}\n")
+    print("Classification Report:")
+    print(classification_report(y_test, y_pred))
+
+
+def save_model(final_model):
+    os.makedirs(MODEL_PATH, exist_ok=True)
+    model_path = os.path.join(MODEL_PATH, "final_xgb_model.pkl")
+    joblib.dump(final_model, model_path)
+    print(f"✅ Final model saved successfully at: {model_path}")
+    return model_path
+
+
+def main(mode=TRAINING_MODE):
+    if mode == "external_memory":
+        final_model = train_external_memory()
+        X_test = pd.read_csv(os.path.join(DATA_PATH, "X_test.csv"))
+        y_test = pd.read_csv(os.path.join(DATA_PATH, "y_test.csv"))
+    else:
+        X_train, y_train, X_val, y_val, X_test, y_test = load_splits()
+        final_model = train_in_memory(X_train, y_train, X_val, y_val)
+
+    print("✅ Final model training completed.")
+    evaluate(final_model, X_test, y_test)
+    save_model(final_model)
 
-model_path = os.path.join(save_dir, "final_xgb_model.pkl")
-joblib.dump(final_model, model_path)
 
-print(f"✅ Final model saved successfully at: {model_path}")
+if __name__ == "__main__":
+    main()
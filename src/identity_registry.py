@@ -0,0 +1,213 @@
+"""
+identity_registry.py
+Persistent integer identities for drivers, constructors and circuits.
+
+Codes are assigned once and never change, so they can be used as join and
+groupby keys across seasons:
+    - drivers are keyed by FastF1's DriverId; abbreviations and full names are
+      aliases, and car numbers are stored per season (numbers change, e.g. a
+      champion switching to #1)
+    - constructors are keyed by TeamId/TeamName; renamed teams map onto the
+      same code through CONSTRUCTOR_LINEAGE
+    - circuits are keyed by event location; event names are aliases
+Display names for every code come from the same file.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import REGISTRY_PATH
+
+KINDS = ("driver", "constructor", "circuit")
+
+# Same team, new name or TeamName spelling -> one constructor code (keys are TeamId or normalized TeamName)
+CONSTRUCTOR_LINEAGE = {
+    "red_bull_racing": "red_bull",
+    "haas_f1_team": "haas",
+    "alpine_f1_team": "alpine",
+    "aston_martin_aramco": "aston_martin",
+    "mercedes_amg": "mercedes",
+    "scuderia_ferrari": "ferrari",
+    "toro_rosso": "rb",
+    "alphatauri": "rb",
+    "racing_bulls": "rb",
+    "visa_cash_app_rb": "rb",
+    "alfa": "sauber",
+    "alfa_romeo": "sauber",
+    "alfa_romeo_racing": "sauber",
+    "kick_sauber": "sauber",
+    "stake_f1_team_kick_sauber": "sauber",
+    "audi": "sauber",
+    "racing_point": "aston_martin",
+    "renault": "alpine",
+}
+
+
+def normalize(key):
+    return str(key).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class IdentityRegistry:
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        else:
+            self._data = {kind: {"entities": {}, "aliases": {}} for kind in KINDS}
+
+    # ============================
+    # Core lookups
+    # ============================
+    def _canonical(self, kind, key):
+        key = normalize(key)
+        return CONSTRUCTOR_LINEAGE.get(key, key) if kind == "constructor" else key
+
+    def resolve(self, kind, key):
+        """Code for a key or any of its aliases (None if unknown)."""
+        return self._data[kind]["aliases"].get(self._canonical(kind, key))
+
+    def _new(self, kind, name):
+        entities = self._data[kind]["entities"]
+        code = len(entities) + 1
+        entities[str(code)] = {"name": str(name)}
+        return code
+
+    def _alias(self, kind, code, *aliases):
+        for alias in aliases:
+            if alias is not None and not pd.isna(alias) and str(alias):
+                self._data[kind]["aliases"][self._canonical(kind, alias)] = code
+
+    def register(self, kind, key, name=None, aliases=()):
+        """Returns the code for key, creating it if needed, and records aliases/display name."""
+        code = self.resolve(kind, key)
+        for alias in aliases:
+            if code is None:
+                code = self.resolve(kind, alias)
+        if code is None:
+            code = self._new(kind, name if name is not None else key)
+        elif name is not None:
+            self._data[kind]["entities"][str(code)]["name"] = str(name)
+        self._alias(kind, code, key, *aliases)
+        return code
+
+    def name(self, kind, code):
+        entity = self._data[kind]["entities"].get(str(code))
+        return entity["name"] if entity else None
+
+    def names(self, kind):
+        """{code: display name} for every entity of a kind."""
+        return {int(code): e["name"] for code, e in self._data[kind]["entities"].items()}
+
+    def encode(self, kind, keys, names=None):
+        """
+        Vectorized: codes for a column of keys, registering only the unseen unique values.
+        Display names are aliased too, so keying by TeamId or TeamName gives the same code.
+        """
+        keys = pd.Series(keys).reset_index(drop=True)
+        names = keys if names is None else pd.Series(names).reset_index(drop=True)
+        uniques = pd.DataFrame({"key": keys, "name": names}).drop_duplicates("key")
+        mapping = {
+            k: self.register(kind, k, name=n, aliases=[n]) for k, n in zip(uniques["key"], uniques["name"])
+        }
+        return keys.map(mapping).to_numpy(dtype=np.int64)
+
+    # ============================
+    # Drivers
+    # ============================
+    def register_driver(self, driver_id, abbreviation, number, season, full_name=None):
+        """Registers a driver for one season: stable code, abbreviation display name, car number."""
+        has_id = driver_id is not None and not pd.isna(driver_id) and str(driver_id) != ""
+        code = self.resolve("driver", driver_id) if has_id else None
+        if code is None:
+            # Fall back to the abbreviation unless it belongs to a different DriverId
+            code = self.resolve("driver", abbreviation)
+            known_id = self._data["driver"]["entities"][str(code)].get("driver_id") if code else None
+            if has_id and known_id not in (None, normalize(driver_id)):
+                code = None
+        if code is None:
+            code = self._new("driver", abbreviation)
+
+        entity = self._data["driver"]["entities"][str(code)]
+        entity["name"] = str(abbreviation)
+        if has_id:
+            entity["driver_id"] = normalize(driver_id)
+        self._alias("driver", code, driver_id if has_id else None, abbreviation, full_name)
+
+        if number is not None and not pd.isna(number):
+            entity.setdefault("numbers", {})[str(season)] = int(number)
+            self._data["driver"].setdefault("numbers", {}).setdefault(str(season), {})[str(int(number))] = code
+        return code
+
+    def register_drivers(self, results, season):
+        """Codes for a FastF1 results table (DriverId/Abbreviation/DriverNumber/FullName columns)."""
+        cols = {c: results[c] if c in results.columns else pd.Series([None] * len(results), index=results.index)
+                for c in ("DriverId", "Abbreviation", "DriverNumber", "FullName")}
+        return np.array([
+            self.register_driver(d, a, n, season, f)
+            for d, a, n, f in zip(cols["DriverId"], cols["Abbreviation"], cols["DriverNumber"], cols["FullName"])
+        ], dtype=np.int64)
+
+    def driver_for_number(self, number, season):
+        """Driver code for a car number, using the latest season up to `season` that knows it."""
+        by_season = self._data["driver"].get("numbers", {})
+        for s in sorted((int(s) for s in by_season), reverse=True):
+            if s <= int(season) and str(int(number)) in by_season[str(s)]:
+                return by_season[str(s)][str(int(number))]
+        return None
+
+    def drivers_for_numbers(self, numbers, season):
+        return np.array([self.driver_for_number(n, season) or 0 for n in numbers], dtype=np.int64)
+
+    def resolve_drivers(self, table, season):
+        """
+        Driver codes for an entry list / qualifying table: by DriverId, then Abbreviation,
+        and by car number (Driver_ID) only for rows neither identifies (0 if unknown).
+        """
+        codes = np.zeros(len(table), dtype=np.int64)
+        for col in ("DriverId", "Abbreviation"):
+            if col in table.columns:
+                todo = codes == 0
+                codes[todo] = [
+                    (self.resolve("driver", key) or 0) if not pd.isna(key) and str(key) else 0
+                    for key in table[col].to_numpy()[todo]
+                ]
+        todo = codes == 0
+        if todo.any() and "Driver_ID" in table.columns:
+            codes[todo] = self.drivers_for_numbers(table["Driver_ID"].to_numpy()[todo], season)
+        return codes
+
+    # ============================
+    # Backfill & persistence
+    # ============================
+    def add_codes(self, df):
+        """Adds Driver_Code / Constructor_ID / Circuit_ID to a dataset fetched before the registry existed."""
+        if "Driver_Code" in df.columns:
+            return df
+        keys = pd.DataFrame({"Driver": df["Driver"], "Driver_ID": df["Driver_ID"], "Season": df["Season"]})
+        uniques = keys.drop_duplicates()
+        codes = {
+            (d, n, s): self.register_driver(None, d, n, s)
+            for d, n, s in zip(uniques["Driver"], uniques["Driver_ID"], uniques["Season"])
+        }
+        df["Driver_Code"] = [codes[k] for k in zip(keys["Driver"], keys["Driver_ID"], keys["Season"])]
+        # Legacy Constructor_ID came from per-event factorize() or raw TeamId strings — re-encode
+        df["Constructor_ID"] = self.encode("constructor", df["Constructor"])
+        df["Circuit_ID"] = self.encode("circuit", df["Circuit_Name"])
+        return df
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=1, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    registry = IdentityRegistry()
+    for kind in KINDS:
+        print(f"\n📇 {kind.title()}s:")
+        for code, name in registry.names(kind).items():
+            print(f"   {code:>3}  {name}")
@@ -0,0 +1,65 @@
+"""
+lap_store.py
+Stored race lap tables (data/laps/<Race_ID>.csv), written by data_fetcher
+and read by race_replay. Needs pandas only, so fetching does not import the
+modelling stack.
+
+One row per completed lap: Driver_Code, LapNumber, Time_s (session time at
+the line) and Pit_In.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import LAPS_DIR
+
+REQUIRED_COLUMNS = ["Driver_Code", "LapNumber", "Time", "PitInTime"]
+
+
+def write_race_laps(laps, race_id, laps_dir=LAPS_DIR):
+    """Saves a FastF1 lap table that already carries a Driver_Code column."""
+    missing = [c for c in REQUIRED_COLUMNS if c not in laps.columns]
+    if missing:
+        print(f"   ⚠️ No lap timing written for {race_id}: missing {missing}")
+        return None
+
+    laps = laps[laps["Time"].notna() & laps["LapNumber"].notna() & laps["Driver_Code"].notna()]
+    if laps.empty:
+        print(f"   ⚠️ No lap timing written for {race_id}")
+        return None
+
+    table = pd.DataFrame({
+        "Driver_Code": laps["Driver_Code"].astype(np.int64),
+        "LapNumber": laps["LapNumber"].astype(np.int64),
+        "Time_s": laps["Time"].dt.total_seconds(),
+        "Pit_In": laps["PitInTime"].notna().astype(np.int8),
+    }).sort_values(["Time_s", "Driver_Code"])
+
+    os.makedirs(laps_dir, exist_ok=True)
+    path = os.path.join(laps_dir, f"{race_id}.csv")
+    table.to_csv(path, index=False)
+    return path
+
+
+def load_race_laps(race_id, laps_dir=LAPS_DIR):
+    return pd.read_csv(os.path.join(laps_dir, f"{race_id}.csv"))
+
+
+def stored_race_ids(laps_dir=LAPS_DIR):
+    """Stored Race_IDs in chronological order ('2024_7' before '2024_10')."""
+    race_ids = (os.path.basename(p)[:-4] for p in glob.glob(os.path.join(laps_dir, "*.csv")))
+    return sorted(race_ids, key=lambda r: tuple(int(x) for x in r.split("_")))
+
+
+def race_grid(race_id, raw_df):
+    """
+    Driver_Code -> Grid_Position (and Finish_Position) for one race from raw_data.csv.
+    Cars without a grid slot (pit-lane starts, no qualifying time) start from the back.
+    """
+    race = raw_df[raw_df["Race_ID"].astype(str) == str(race_id)]
+    grid = race.set_index("Driver_Code")[["Grid_Position", "Finish_Position"]].copy()
+    grid["Grid_Position"] = grid["Grid_Position"].fillna(len(grid))
+    return grid
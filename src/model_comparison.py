@@ -0,0 +1,177 @@
+"""
+model_comparison.py
+Scores several saved models and/or hyperparameter configurations against one
+shared test matrix and prints a single leaderboard.
+
+Data is loaded and placed in shared memory once; each worker in the process
+pool attaches it read-only, aligns columns to its model by index, and
+returns test-set probabilities plus the model. Inference latency is then
+timed serially once the pool has drained, so it excludes contention from
+other workers. Ranking metrics and bootstrap CIs are computed in one place
+for every model.
+
+A spec is either
+    {"name": "final", "model_path": "models/final_xgb_model.pkl"}
+or
+    {"name": "deeper", "params": {...XGBClassifier params...}}   # trained on train+val
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import joblib
+from xgboost import XGBClassifier
+
+from config import DATA_DIR, MODEL_PATH
+from parallel_search import SharedMatrix, attach_shared, plan_cores, available_cores
+from scenario_predictor import align_features
+from bootstrap_metrics import bootstrap_metrics
+
+LATENCY_REPEATS = 20
+GRID_ROWS = 20      # one race grid, for single-prediction latency
+
+_worker = {}
+
+
+def _attach(test_spec, train_spec, y_spec, columns, n_threads):
+    """Pool initializer: map the shared matrices once per worker."""
+    _worker["X_test"], _worker["test_shm"] = attach_shared(test_spec)
+    if train_spec is not None:
+        _worker["X_train"], _worker["train_shm"] = attach_shared(train_spec)
+        _worker["y_train"], _worker["y_shm"] = attach_shared(y_spec)
+    _worker["columns"] = columns
+    _worker["n_threads"] = n_threads
+
+
+def _aligned_test(features):
+    """Test matrix in the model's feature order; columns it never saw are zero-filled."""
+    columns = _worker["columns"]
+    X = np.zeros((_worker["X_test"].shape[0], len(features)), dtype=np.float32)
+    for j, col in enumerate(features):
+        if col in columns:
+            X[:, j] = _worker["X_test"][:, columns.index(col)]
+    return pd.DataFrame(X, columns=features)
+
+
+def _median_latency_ms(model, X):
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _score_spec(spec):
+    """Loads or trains one model, then scores the shared test matrix."""
+    n_threads = _worker["n_threads"]
+    if "model_path" in spec:
+        model = joblib.load(spec["model_path"])
+        model.set_params(n_jobs=n_threads)
+        model.get_booster().set_param({"nthread": n_threads})
+    else:
+        X_train = pd.DataFrame(_worker["X_train"], columns=_worker["columns"], copy=False)
+        model = XGBClassifier(**spec["params"], n_jobs=n_threads)
+        model.fit(X_train, _worker["y_train"])
+
+    X_test = _aligned_test(model.get_booster().feature_names)
+    probs = model.predict_proba(X_test)[:, 1]
+    return {"name": spec["name"], "probs": probs, "model": model}
+
+
+def load_comparison_data(data_dir=DATA_DIR, need_train=False):
+    """Loads the test matrix, its race metadata (meta_test.csv, same row order) and optionally train+val — once."""
+    X_test = pd.read_csv(os.path.join(data_dir, "X_test.csv"))
+    y_test = pd.read_csv(os.path.join(data_dir, "y_test.csv")).squeeze("columns")
+    meta = pd.read_csv(os.path.join(data_dir, "meta_test.csv"))
+    if len(meta) != len(X_test):
+        raise ValueError("❌ meta_test.csv does not match X_test.csv — rerun data_preparation.py.")
+
+    X_train = y_train = None
+    if need_train:
+        X_train = pd.concat([pd.read_csv(os.path.join(data_dir, f"X_{s}.csv")) for s in ("train", "val")])
+        y_train = pd.concat([pd.read_csv(os.path.join(data_dir, f"y_{s}.csv")) for s in ("train", "val")])
+        X_train = X_train.reindex(columns=X_test.columns, fill_value=0)
+    return X_test, y_test, meta, X_train, y_train
+
+
+def compare_models(specs, data_dir=DATA_DIR, n_boot=1000, total_cores=None):
+    """Scores every spec across a process pool and returns the leaderboard DataFrame."""
+    need_train = any("params" in spec for spec in specs)
+    X_test, y_test, meta, X_train, y_train = load_comparison_data(data_dir, need_train=need_train)
+    columns = list(X_test.columns)
+    workers, threads = plan_cores(len(specs), total_cores)
+    print(f"🧮 Comparing {len(specs)} model(s) on {workers} worker(s) x {threads} xgb thread(s), "
+          f"test matrix {X_test.shape}")
+
+    shared = [SharedMatrix(X_test.to_numpy())]
+    train_spec = y_spec = None
+    if need_train:
+        shared += [SharedMatrix(X_train.to_numpy()), SharedMatrix(y_train.to_numpy().ravel())]
+        train_spec, y_spec = shared[1].spec, shared[2].spec
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(shared[0].spec, train_spec, y_spec, columns, threads),
+        ) as pool:
+            results = list(pool.map(_score_spec, specs))
+    finally:
+        for matrix in shared:
+            matrix.close()
+    print(f"⏱️ Scored all models in {time.perf_counter() - start:.1f}s")
+
+    # Latency: one model at a time on an idle machine, all cores to XGBoost
+    cores = total_cores or available_cores()
+    for result in results:
+        model = result.pop("model")
+        model.set_params(n_jobs=cores)
+        model.get_booster().set_param({"nthread": cores})
+        X = align_features(X_test, model.get_booster().feature_names).astype(np.float32)
+        result["latency_test_ms"] = _median_latency_ms(model, X)
+        result["latency_grid_ms"] = _median_latency_ms(model, X.iloc[:GRID_ROWS])
+
+    rows = []
+    for result in results:
+        ci = bootstrap_metrics(meta["Race_ID"], meta["Finish_Position"], y_test, result["probs"],
+                               n_boot=n_boot).set_index("Metric")
+        rows.append({
+            "Model": result["name"],
+            "ROC_AUC": ci.loc["ROC_AUC", "Estimate"],
+            "ROC_AUC_CI_Low": ci.loc["ROC_AUC", "CI_Low"],
+            "ROC_AUC_CI_High": ci.loc["ROC_AUC", "CI_High"],
+            "Winner_Accuracy": ci.loc["Top1_Accuracy", "Estimate"],
+            "Podium_Accuracy": ci.loc["Top3_Accuracy", "Estimate"],
+            "Top5_Accuracy": ci.loc["Top5_Accuracy", "Estimate"],
+            "Latency_Test_ms": result["latency_test_ms"],
+            "Latency_Grid_ms": result["latency_grid_ms"],
+        })
+
+    leaderboard = pd.DataFrame(rows).sort_values(
+        ["ROC_AUC", "Podium_Accuracy"], ascending=False
+    ).reset_index(drop=True)
+    leaderboard.index += 1
+    return leaderboard
+
+
+if __name__ == "__main__":
+    from final_model_trainer import best_params
+
+    specs = [
+        {"name": "final_xgb_model", "model_path": MODEL_PATH},
+        {"name": "shallow", "params": {**best_params, "max_depth": 3}},
+        {"name": "deeper_faster", "params": {**best_params, "max_depth": 7, "learning_rate": 0.05}},
+    ]
+    leaderboard = compare_models(specs)
+
+    print("\n🏆 Model Leaderboard:")
+    print(leaderboard.round(4).to_string())
+
+    output_path = os.path.join(DATA_DIR, "model_leaderboard.csv")
+    leaderboard.to_csv(output_path, index_label="Rank")
+    print(f"\n📄 Saved leaderboard to: {output_path}")
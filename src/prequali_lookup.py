@@ -0,0 +1,241 @@
+"""
+prequali_lookup.py
+Race-weekend fast path: precompute win probabilities before qualifying,
+then turn qualifying results into predictions with a table lookup.
+
+Everything except Grid_Position and Qualifying_Gap_to_Pole is known before
+qualifying, so the model is evaluated once per driver over every grid slot
+and every gap interval. XGBoost trees split on `gap < threshold`, so the
+prediction is constant between consecutive gap thresholds of the model —
+storing one value per interval makes the lookup exact, not approximate.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from scenario_predictor import align_features, model_hash
+from upcoming_data_fetcher import compute_driver_history
+from identity_registry import IdentityRegistry
+from config import (DATA_DIR, MODEL_PATH, PROCESSED_DATA_PATH, QUALIFYING_PATH, UPCOMING_RACE_ID,
+                    UPCOMING_GRAND_PRIX)
+
+MAX_GRID = 20
+GAP_FEATURE = "Qualifying_Gap_to_Pole"
+GRID_FEATURE = "Grid_Position"
+VALIDATION_SAMPLES = 2000   # random (driver, slot, gap) cells exact-scored when the table is built
+
+
+def split_thresholds(model, feature):
+    """Sorted unique float32 split thresholds the model uses for one feature."""
+    booster = model.get_booster()
+    feat_idx = booster.feature_names.index(feature)
+    trees = json.loads(bytes(booster.save_raw(raw_format="json")))["learner"]["gradient_booster"]["model"]["trees"]
+
+    thresholds = []
+    for tree in trees:
+        idx = np.asarray(tree["split_indices"])
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        is_split = np.asarray(tree["left_children"]) != -1
+        thresholds.append(cond[is_split & (idx == feat_idx)])
+    return np.unique(np.concatenate(thresholds)) if thresholds else np.array([], dtype=np.float32)
+
+
+# ============================
+# 1. Precompute (before qualifying)
+# ============================
+def precompute_table(model_path, processed_data_path, entry_list_path, x_train_path,
+                     upcoming_race_id, upcoming_circuit_name, output_path):
+    """
+    Builds the (driver, grid slot, gap interval) probability table and saves it as .npz.
+    entry_list_path: CSV with a Driver_ID column for the upcoming race (plus DriverId /
+    Abbreviation where known, which identify the driver ahead of the car number).
+    """
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    features = model.get_booster().feature_names
+    processed_df = pd.read_csv(processed_data_path)
+    entry_list = pd.read_csv(entry_list_path).drop_duplicates("Driver_ID").sort_values("Driver_ID")
+    driver_ids = entry_list["Driver_ID"].to_numpy()
+
+    x_train_cols = pd.read_csv(x_train_path, nrows=0).columns
+    circuit_cols = [col for col in x_train_cols if col.startswith('Circuit_Name_')]
+    circuit_one_hot = {col: int(col == f'Circuit_Name_{upcoming_circuit_name}') for col in circuit_cols}
+
+    season = int(str(upcoming_race_id).split('_')[0])
+    driver_codes = IdentityRegistry().resolve_drivers(entry_list, season)
+    history = pd.DataFrame([
+        {**compute_driver_history(processed_df, code, upcoming_race_id), **circuit_one_hot}
+        for code in driver_codes
+    ])
+    history.fillna(history.median(numeric_only=True), inplace=True)
+    history = align_features(history, features).to_numpy(dtype=np.float64)
+
+    # One representative value per gap interval: below the first threshold, then each threshold
+    gap_breaks = split_thresholds(model, GAP_FEATURE)
+    gap_points = np.r_[gap_breaks[0] - 1 if len(gap_breaks) else 0.0, gap_breaks]
+    positions = np.arange(1, MAX_GRID + 1)
+
+    n_d, n_p, n_g = len(driver_ids), len(positions), len(gap_points)
+    X = np.repeat(history, n_p * n_g, axis=0)
+    X[:, features.index(GRID_FEATURE)] = np.tile(np.repeat(positions, n_g), n_d)
+    X[:, features.index(GAP_FEATURE)] = np.tile(gap_points, n_d * n_p)
+
+    probs = model.predict_proba(pd.DataFrame(X, columns=features))[:, 1]
+    table = {
+        "driver_ids": driver_ids,
+        "positions": positions,
+        "gap_breaks": gap_breaks,
+        "probs": probs.reshape(n_d, n_p, n_g).astype(np.float32),
+        "history": history,
+        "features": np.array(features),
+        "model_key": model_hash(model),
+        "model_file_key": file_hash(model_path),
+    }
+    table["max_error"] = validate_table(table, model)
+    np.savez(output_path, **table)
+    print(f"✅ Precomputed {X.shape[0]} predictions ({n_d} drivers x {n_p} slots x {n_g} gap intervals) "
+          f"in {time.perf_counter() - start:.1f}s -> {output_path}")
+    print(f"🔎 Max |lookup - exact| over {VALIDATION_SAMPLES} sampled cells = {table['max_error']:.2e}")
+
+
+def file_hash(path):
+    """sha1 of the saved model file — checked at lookup time without unpickling the model."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def validate_table(table, model, n_samples=VALIDATION_SAMPLES, seed=0):
+    """Exact-scores random cells, with gaps drawn anywhere inside their interval. Returns the max error."""
+    rng = np.random.default_rng(seed)
+    breaks = table["gap_breaks"].astype(np.float64)
+    lows = np.r_[0.0 if not len(breaks) else min(0.0, breaks[0] - 1), breaks]
+    highs = np.r_[breaks, (breaks[-1] if len(breaks) else 0.0) + 1]
+
+    d = rng.integers(len(table["driver_ids"]), size=n_samples)
+    positions = rng.choice(table["positions"], size=n_samples)
+    interval = rng.integers(len(lows), size=n_samples)
+    gaps = lows[interval] + rng.random(n_samples) * (highs[interval] - lows[interval])
+    gaps = np.minimum(gaps.astype(np.float32), np.nextafter(highs[interval].astype(np.float32), -np.inf))
+
+    driver_ids = table["driver_ids"][d]
+    probs, found = lookup(table, driver_ids, positions, gaps)
+    exact = exact_scores(table, model, driver_ids, positions, gaps)
+    return float(np.max(np.abs(probs[found] - exact[found]))) if found.any() else 0.0
+
+
+def load_table(table_path):
+    with np.load(table_path, allow_pickle=False) as npz:
+        return {key: npz[key] for key in npz.files}
+
+
+# ============================
+# 2. Lookup (after qualifying)
+# ============================
+def qualifying_gaps(qualifying_times):
+    """Gap to pole in seconds, with missing times filled by the median gap (as in generate_prediction_input)."""
+    gaps = np.asarray(qualifying_times, dtype=np.float64)
+    gaps = gaps - np.nanmin(gaps)
+    return np.where(np.isnan(gaps), np.nanmedian(gaps), gaps)
+
+
+def lookup(table, driver_ids, grid_positions, gaps):
+    """
+    Win probabilities straight from the table.
+    Returns (probs, found) — rows with found == False need exact scoring.
+    """
+    driver_ids = np.asarray(driver_ids)
+    grid_positions = np.asarray(grid_positions)
+    d = np.searchsorted(table["driver_ids"], driver_ids)
+    d = np.clip(d, 0, len(table["driver_ids"]) - 1)
+    p = grid_positions.astype(np.int64) - 1
+    g = np.searchsorted(table["gap_breaks"], np.asarray(gaps, dtype=np.float32), side="right")
+
+    found = (table["driver_ids"][d] == driver_ids) & (p >= 0) & (p < len(table["positions"])) \
+        & (grid_positions == np.round(grid_positions))
+    probs = np.full(len(driver_ids), np.nan)
+    probs[found] = table["probs"][d[found], p[found], g[found]]
+    return probs, found
+
+
+def exact_scores(table, model, driver_ids, grid_positions, gaps):
+    """Scores rows with the model using the stored pre-qualifying history."""
+    features = list(table["features"])
+    d = np.searchsorted(table["driver_ids"], driver_ids)
+    X = table["history"][d].copy()
+    X[:, features.index(GRID_FEATURE)] = grid_positions
+    X[:, features.index(GAP_FEATURE)] = gaps
+    return model.predict_proba(pd.DataFrame(X, columns=features))[:, 1]
+
+
+def predict_from_qualifying(table_path, model_path, qualifying_data_path, tolerance=1e-6, verify=False):
+    """
+    Looks up predictions for real qualifying results. The table was validated
+    when it was built; the model is only loaded for rows outside the table
+    (grid slots it does not cover), a table over tolerance, or verify=True.
+    """
+    start = time.perf_counter()
+    table = load_table(table_path)
+    if file_hash(model_path) != str(table["model_file_key"]):
+        raise ValueError("❌ Lookup table was built with a different model — rerun precompute_table.")
+
+    qual_df = pd.read_csv(qualifying_data_path)
+    qual_df.columns = qual_df.columns.str.strip()
+    driver_ids = qual_df["Driver_ID"].to_numpy()
+    grid_positions = qual_df["Grid_Position"].to_numpy()
+    gaps = qualifying_gaps(qual_df["Qualifying_Time"].to_numpy())
+
+    probs, found = lookup(table, driver_ids, grid_positions, gaps)
+    known = np.isin(driver_ids, table["driver_ids"])
+    if (~known).any():
+        print(f"⚠️ Drivers missing from the table: {list(driver_ids[~known])} — run the full pipeline for them.")
+
+    table_ok = float(table["max_error"]) <= tolerance
+    if not table_ok:
+        print(f"⚠️ Table max error {float(table['max_error']):.2e} is over tolerance {tolerance:.0e} — using exact scores.")
+    exact_rows = known & (~found | (not table_ok) | verify)
+    if exact_rows.any():
+        model = joblib.load(model_path)
+        exact = np.full(len(driver_ids), np.nan)
+        exact[exact_rows] = exact_scores(table, model, driver_ids[exact_rows],
+                                         grid_positions[exact_rows], gaps[exact_rows])
+        if verify and table_ok:
+            max_err = np.nanmax(np.abs(probs[found] - exact[found])) if found.any() else 0.0
+            print(f"🔎 Max |lookup - exact| = {max_err:.2e} (tolerance {tolerance:.0e})")
+            if max_err > tolerance:
+                print("⚠️ Lookup outside tolerance — using exact scores.")
+                found = np.zeros_like(found)
+        probs = np.where(found & table_ok, probs, exact)
+
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    print(f"⚡ Predictions for {len(driver_ids)} drivers ({found.sum()} from the table, "
+          f"{exact_rows.sum()} exact-scored) in {elapsed_us:.0f} µs")
+
+    qual_df["Win_Probability"] = probs
+    return qual_df.sort_values("Win_Probability", ascending=False)
+
+
+if __name__ == "__main__":
+    # Thursday/Friday: entry list known, qualifying not yet run
+    table_path = os.path.join(DATA_DIR, 'prequali_table.npz')
+    precompute_table(
+        model_path=MODEL_PATH,
+        processed_data_path=PROCESSED_DATA_PATH,
+        entry_list_path=os.path.join(DATA_DIR, 'entry_list.csv'),
+        x_train_path=os.path.join(DATA_DIR, 'X_train.csv'),
+        upcoming_race_id=UPCOMING_RACE_ID,
+        upcoming_circuit_name=UPCOMING_GRAND_PRIX,
+        output_path=table_path
+    )
+
+    # Saturday: qualifying results arrive
+    print(predict_from_qualifying(
+        table_path=table_path,
+        model_path=MODEL_PATH,
+        qualifying_data_path=QUALIFYING_PATH
+    ).head(10).to_string(index=False))
@@ -0,0 +1,270 @@
+"""
+race_replay.py
+Lap-by-lap in-race win probabilities from the FastF1 lap table.
+
+Each race's lap table (race_session.laps) is stored by lap_store.py as
+data/laps/<Race_ID>.csv with one row per completed lap: Driver_Code,
+LapNumber, Time_s (session time at the line) and Pit_In. It is held as dense (driver, lap) arrays, and the
+race state at every leader lap — running position, gap to the leader and to
+the car ahead, laps down, pit stops completed, retirement — is computed for
+all (lap, driver) pairs in one vectorized pass and scored in one batch.
+
+LiveRace keeps the same arrays and accepts rows incrementally (e.g. from a
+local replay feed); every leader lap is scored as soon as all line crossings
+up to it have arrived, so a replay and a live run give identical numbers.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from xgboost import XGBClassifier
+from sklearn.metrics import roc_auc_score
+
+from config import LAPS_DIR, INRACE_MODEL_PATH, RAW_DATA_PATH
+from lap_store import load_race_laps, stored_race_ids, race_grid
+
+RETIRE_LAPS = 2.0    # no line crossing for this many leader laps -> retired
+
+INRACE_FEATURES = [
+    "Lap_Fraction",
+    "Position",
+    "Grid_Position",
+    "Positions_Gained",
+    "Gap_To_Leader_s",
+    "Gap_To_Ahead_s",
+    "Laps_Down",
+    "Pit_Stops",
+    "Retired",
+]
+
+
+# ============================
+# 1. Local replay feed
+# ============================
+def replay_feed(laps, by="lap"):
+    """
+    Local replay feed: yields the stored lap table in arrival order, either one
+    chunk per lap number (by="lap") or one line crossing at a time (by="crossing").
+    """
+    laps = laps.sort_values(["Time_s", "Driver_Code"])
+    if by == "crossing":
+        for i in range(len(laps)):
+            yield laps.iloc[i:i + 1]
+    else:
+        for _, chunk in laps.groupby("LapNumber", sort=True):
+            yield chunk
+
+
+# ============================
+# 2. Vectorized race state
+# ============================
+class RaceState:
+    """Dense (driver, lap) arrays of line-crossing times and pit-ins for one race."""
+
+    def __init__(self, drivers, grid, total_laps):
+        self.drivers = np.asarray(drivers, dtype=np.int64)
+        self.grid = np.asarray(grid, dtype=np.float64)
+        self.total_laps = int(total_laps)
+        self._col = {d: i for i, d in enumerate(self.drivers)}
+        # Column 0 is the start: every car "crossed" at t=0
+        self.crossing = np.full((len(self.drivers), self.total_laps + 1), np.inf)
+        self.crossing[:, 0] = 0.0
+        self.pit_in = np.zeros_like(self.crossing, dtype=np.int64)
+        self.latest_time = -np.inf
+
+    def add_laps(self, rows):
+        """Writes new lap rows (Driver_Code, LapNumber, Time_s, Pit_In) into the arrays."""
+        rows = rows[rows["Driver_Code"].isin(self._col)]
+        if rows.empty:
+            return
+        laps = rows["LapNumber"].to_numpy(dtype=np.int64)
+        if laps.max() > self.total_laps:
+            extra = laps.max() - self.total_laps
+            self.crossing = np.pad(self.crossing, ((0, 0), (0, extra)), constant_values=np.inf)
+            self.pit_in = np.pad(self.pit_in, ((0, 0), (0, extra)))
+            self.total_laps = int(laps.max())
+        d = np.fromiter((self._col[c] for c in rows["Driver_Code"]), dtype=np.int64, count=len(rows))
+        self.crossing[d, laps] = rows["Time_s"].to_numpy(dtype=np.float64)
+        self.pit_in[d, laps] = rows["Pit_In"].to_numpy(dtype=np.int64)
+        self.latest_time = max(self.latest_time, float(rows["Time_s"].max()))
+
+    def leader_times(self):
+        """Time the first car completed each lap (inf where nobody has yet)."""
+        return self.crossing.min(axis=0)
+
+    def ready_laps(self, after=0):
+        """Leader laps after `after` whose every earlier line crossing has been received."""
+        t = self.leader_times()
+        laps = np.arange(after + 1, self.total_laps + 1)
+        return laps[t[laps] <= self.latest_time]
+
+    def features(self, leader_laps):
+        """Race state for every (leader lap, driver) pair in one pass. Returns a DataFrame."""
+        leader_laps = np.asarray(leader_laps, dtype=np.int64)
+        n_laps, n_drivers = len(leader_laps), len(self.drivers)
+        t = self.leader_times()
+        t_lap = t[leader_laps]                                               # (L,)
+
+        # Last lap each car has completed when the leader crosses the line (robust to missing lap rows)
+        crossed = self.crossing[None, :, 1:] <= t_lap[:, None, None]                   # (L, D, laps)
+        completed = (crossed * np.arange(1, self.total_laps + 1)).max(axis=2)          # (L, D)
+        rows = np.broadcast_to(np.arange(n_drivers), completed.shape)
+        last_crossing = self.crossing[rows, completed]
+        pit_stops = np.cumsum(self.pit_in, axis=1)[rows, completed]
+
+        # Timing-screen gap: this car's latest crossing vs the leader's crossing of the same lap
+        gap_leader = last_crossing - t[completed]
+        # Cars that have not reached the line yet this lap are still on the lead lap
+        laps_down = np.maximum(leader_laps[:, None] - completed - 1, 0)
+
+        # Retired: silent for RETIRE_LAPS leader laps
+        lap_length = t_lap - np.where(leader_laps > 1, t[np.maximum(leader_laps - 1, 0)], np.nan)
+        with np.errstate(invalid="ignore"):
+            retired = (t_lap[:, None] - last_crossing) > RETIRE_LAPS * lap_length[:, None]
+
+        # Running order: running cars first, then most laps, then earliest crossing, then grid
+        grid = np.broadcast_to(self.grid, completed.shape)
+        order = np.lexsort((grid, last_crossing, -completed, retired), axis=-1)
+        position = np.empty_like(order)
+        np.put_along_axis(position, order, np.arange(1, n_drivers + 1)[None, :], axis=-1)
+
+        gap_sorted = np.take_along_axis(gap_leader, order, axis=-1)
+        gap_ahead_sorted = np.diff(gap_sorted, axis=-1, prepend=gap_sorted[:, :1])
+        gap_ahead = np.empty_like(gap_leader)
+        np.put_along_axis(gap_ahead, order, gap_ahead_sorted, axis=-1)
+
+        return pd.DataFrame({
+            "Lap": np.repeat(leader_laps, n_drivers),
+            "Driver_Code": np.tile(self.drivers, n_laps),
+            "Lap_Fraction": np.repeat(leader_laps / self.total_laps, n_drivers),
+            "Position": position.ravel(),
+            "Grid_Position": grid.ravel(),
+            "Positions_Gained": (grid - position).ravel(),
+            "Gap_To_Leader_s": gap_leader.ravel(),
+            "Gap_To_Ahead_s": gap_ahead.ravel(),
+            "Laps_Down": laps_down.ravel(),
+            "Pit_Stops": pit_stops.ravel(),
+            "Retired": retired.ravel().astype(np.int8),
+        })
+
+
+def race_features(laps, grid, total_laps=None):
+    """Features for every (leader lap, driver) pair of a stored race. grid: Series Driver_Code -> Grid_Position."""
+    total_laps = total_laps or int(laps["LapNumber"].max())
+    state = RaceState(grid.index.to_numpy(), grid.to_numpy(), total_laps)
+    state.add_laps(laps)
+    return state.features(state.ready_laps())
+
+
+# ============================
+# 3. Scoring
+# ============================
+class RaceReplay:
+    def __init__(self, model_path=INRACE_MODEL_PATH, model=None):
+        self.model = model if model is not None else joblib.load(model_path)
+
+    def score(self, features):
+        """One predict call for all rows; probabilities are normalized to sum to 1 per lap."""
+        raw = self.model.predict_proba(features[INRACE_FEATURES])[:, 1]
+        raw = np.where(features["Retired"].to_numpy() == 1, 0.0, raw)
+        lap_idx = pd.factorize(features["Lap"])[0]
+        totals = np.bincount(lap_idx, weights=raw)
+        scored = features.copy()
+        scored["Win_Probability"] = raw / np.where(totals > 0, totals, 1.0)[lap_idx]
+        return scored
+
+    def replay(self, laps, grid, total_laps=None):
+        """Whole race in one feature pass and one predict call."""
+        return self.score(race_features(laps, grid, total_laps))
+
+    def live(self, grid, total_laps):
+        return LiveRace(self, grid, total_laps)
+
+
+class LiveRace:
+    """Incremental replay: feed lap rows as they arrive, get newly completed leader laps back."""
+
+    def __init__(self, replay, grid, total_laps):
+        self.replay = replay
+        self.state = RaceState(grid.index.to_numpy(), grid.to_numpy(), total_laps)
+        self.scored_until = 0
+
+    def update(self, rows):
+        self.state.add_laps(rows)
+        laps = self.state.ready_laps(self.scored_until)
+        if not len(laps):
+            return None
+        self.scored_until = int(laps[-1])
+        return self.replay.score(self.state.features(laps))
+
+
+# ============================
+# 4. Training
+# ============================
+def build_training_set(laps_dir=LAPS_DIR, raw_data_path=RAW_DATA_PATH):
+    """(lap, driver) rows for every stored race, labelled with the race winner."""
+    raw_df = pd.read_csv(raw_data_path)
+    frames = []
+    for race_id in stored_race_ids(laps_dir):
+        info = race_grid(race_id, raw_df)
+        if info.empty:
+            continue
+        features = race_features(load_race_laps(race_id, laps_dir), info["Grid_Position"])
+        features["Race_ID"] = race_id
+        features["Is_Winner"] = (features["Driver_Code"].map(info["Finish_Position"]) == 1).astype(np.int8)
+        frames.append(features)
+    if not frames:
+        raise FileNotFoundError(f"❌ No stored lap tables in {laps_dir} — run data_fetcher.py with WRITE_LAPS.")
+    return pd.concat(frames, ignore_index=True)
+
+
+def train_inrace_model(laps_dir=LAPS_DIR, raw_data_path=RAW_DATA_PATH, model_path=INRACE_MODEL_PATH,
+                       test_share=0.2):
+    """Trains on the earlier races, reports ROC AUC / winner accuracy on the later ones, saves the model."""
+    from final_model_trainer import best_params
+
+    data = build_training_set(laps_dir, raw_data_path)
+    races = data["Race_ID"].drop_duplicates().to_numpy()   # already chronological
+    test_races = races[int(len(races) * (1 - test_share)):]
+    is_test = data["Race_ID"].isin(test_races).to_numpy()
+    print(f"📘 {len(data)} (lap, driver) rows from {len(races)} races — {len(test_races)} held out")
+
+    model = XGBClassifier(**best_params)
+    model.fit(data.loc[~is_test, INRACE_FEATURES], data.loc[~is_test, "Is_Winner"])
+
+    if is_test.any():
+        scored = RaceReplay(model=model).score(data[is_test])
+        print(f"🎯 Test ROC AUC (all laps): {roc_auc_score(scored['Is_Winner'], scored['Win_Probability']):.4f}")
+        total_laps = (scored["Lap"] / scored["Lap_Fraction"]).round()
+        for fraction in (0.25, 0.5, 0.75):
+            at = scored[scored["Lap"] == np.maximum(1, (fraction * total_laps).round())]
+            picks = at.loc[at.groupby("Race_ID")["Win_Probability"].idxmax()]
+            print(f"   Winner accuracy at {fraction:.0%} distance: {picks['Is_Winner'].mean():.3f}")
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    joblib.dump(model, model_path)
+    print(f"✅ In-race model saved to: {model_path}")
+    return model
+
+
+if __name__ == "__main__":
+    if not stored_race_ids():
+        raise SystemExit(f"❌ No stored lap tables in {LAPS_DIR} — run data_fetcher.py with WRITE_LAPS first.")
+    train_inrace_model()
+
+    race_id = stored_race_ids()[-1]
+    raw_df = pd.read_csv(RAW_DATA_PATH)
+    grid = race_grid(race_id, raw_df)["Grid_Position"]
+    laps = load_race_laps(race_id)
+
+    replay = RaceReplay()
+    start = time.perf_counter()
+    scored = replay.replay(laps, grid)
+    print(f"\n⏱️ Replayed {race_id}: {scored['Lap'].nunique()} laps x {len(grid)} drivers "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    leaders = scored.loc[scored.groupby("Lap")["Win_Probability"].idxmax(), ["Lap", "Driver_Code", "Win_Probability"]]
+    print(leaders.to_string(index=False))
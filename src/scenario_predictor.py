@@ -0,0 +1,191 @@
+"""
+scenario_predictor.py
+Batched what-if scoring on top of a prediction-input grid (data/new_data.csv).
+
+A scenario is a dict of perturbations applied to the base grid:
+    {
+        "penalties":  {driver_id: places},          # grid drop, cars behind move up
+        "swaps":      [(driver_id, driver_id), ...], # swap grid positions
+        "gap_deltas": {driver_id: seconds},          # change qualifying time
+    }
+
+All variants are built as one (scenarios x drivers x features) array and scored
+in a single predict_proba call. Probabilities are memoized by
+(model hash, feature-row hash) in a bounded LRU cache.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from config import MODEL_PATH, PREDICTION_INPUT_PATH
+
+
+def model_hash(model):
+    """Stable hash of the trained booster (same trees -> same hash)."""
+    raw = model.get_booster().save_raw(raw_format="ubj")
+    return hashlib.sha1(bytes(raw)).hexdigest()
+
+
+def align_features(X, expected_features):
+    """Drops extra columns, zero-fills missing ones and orders them like training."""
+    X = X[[c for c in X.columns if c in expected_features]].copy()
+    for col in expected_features:
+        if col not in X.columns:
+            X[col] = 0
+    return X[expected_features]
+
+
+class PredictionCache:
+    """Bounded LRU of win probabilities keyed by (model hash, row hash)."""
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._store = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model_key, row_keys):
+        probs = np.full(len(row_keys), np.nan)
+        for i, row_key in enumerate(row_keys):
+            key = (model_key, row_key)
+            if key in self._store:
+                self._store.move_to_end(key)
+                probs[i] = self._store[key]
+        found = int(np.count_nonzero(~np.isnan(probs)))
+        self.hits += found
+        self.misses += len(row_keys) - found
+        return probs
+
+    def put_many(self, model_key, row_keys, probs):
+        for row_key, prob in zip(row_keys, probs):
+            self._store[(model_key, row_key)] = float(prob)
+            self._store.move_to_end((model_key, row_key))
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    def __len__(self):
+        return len(self._store)
+
+
+class ScenarioPredictor:
+    def __init__(self, model_path, cache_size=100_000):
+        self.model = joblib.load(model_path)
+        self.model_key = model_hash(self.model)
+        self.features = self.model.get_booster().feature_names
+        self.cache = PredictionCache(cache_size)
+
+    # ============================
+    # 1. Build every variant at once
+    # ============================
+    def build_variants(self, base_grid, scenarios):
+        """Returns (driver_ids, X) with X shaped (n_scenarios, n_drivers, n_features)."""
+        driver_ids = base_grid["Driver_ID"].to_numpy()
+        col_of = {d: i for i, d in enumerate(driver_ids)}
+        X_base = align_features(base_grid, self.features).to_numpy(dtype=np.float64)
+
+        n_scen = len(scenarios)
+        X = np.broadcast_to(X_base, (n_scen,) + X_base.shape).copy()
+        grid_col = self.features.index("Grid_Position")
+        gap_col = self.features.index("Qualifying_Gap_to_Pole")
+        grid = X[:, :, grid_col]
+        gap = X[:, :, gap_col]
+
+        def lookup(driver_id):
+            if driver_id not in col_of:
+                raise ValueError(f"❌ Driver_ID {driver_id} is not on the base grid.")
+            return col_of[driver_id]
+
+        # Flatten perturbations into (scenario, driver, value, pass) arrays;
+        # the k-th perturbation of each scenario is applied in pass k.
+        pen, swp, gap_d = [], [], []
+        for s, scen in enumerate(scenarios):
+            for k, (d, places) in enumerate(scen.get("penalties", {}).items()):
+                pen.append((s, lookup(d), places, k))
+            for k, (a, b) in enumerate(scen.get("swaps", [])):
+                swp.append((s, lookup(a), lookup(b), k))
+            for d, delta in scen.get("gap_deltas", {}).items():
+                gap_d.append((s, lookup(d), delta))
+
+        # Qualifying time changes: shift the driver, then re-base to the new pole
+        if gap_d:
+            s, d, delta = (np.array(v) for v in zip(*gap_d))
+            np.add.at(gap, (s, d), delta)
+            gap -= np.nanmin(gap, axis=1, keepdims=True)
+
+        # Swaps
+        if swp:
+            s, a, b, k = (np.array(v) for v in zip(*swp))
+            for p in range(k.max() + 1):
+                m = k == p
+                ga, gb = grid[s[m], a[m]].copy(), grid[s[m], b[m]].copy()
+                grid[s[m], a[m]], grid[s[m], b[m]] = gb, ga
+
+        # Grid penalties: driver drops `places`, everyone they fall behind moves up one
+        if pen:
+            s, d, places, k = (np.array(v) for v in zip(*pen))
+            back = np.nanmax(grid, axis=1)
+            for p in range(k.max() + 1):
+                m = k == p
+                old = grid[s[m], d[m]]
+                new = np.minimum(old + places[m], back[s[m]])
+                rows = grid[s[m]]
+                rows -= (rows > old[:, None]) & (rows <= new[:, None])
+                rows[np.arange(len(old)), d[m]] = new
+                grid[s[m]] = rows
+
+        return driver_ids, X
+
+    # ============================
+    # 2. Score with memoization
+    # ============================
+    def predict_matrix(self, X_flat):
+        """Win probabilities for a 2-D feature matrix; the cache and the model only see unique rows."""
+        frame = pd.DataFrame(X_flat, columns=self.features)
+        row_keys = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+        uniq_keys, first, inverse = np.unique(row_keys, return_index=True, return_inverse=True)
+        probs = self.cache.get_many(self.model_key, uniq_keys)
+
+        missing = np.isnan(probs)
+        if missing.any():
+            probs[missing] = self.model.predict_proba(frame.iloc[first[missing]])[:, 1]
+            self.cache.put_many(self.model_key, uniq_keys[missing], probs[missing])
+        return probs[inverse]
+
+    def run(self, base_grid, scenarios):
+        """Scores every scenario; returns one row per (scenario, driver)."""
+        driver_ids, X = self.build_variants(base_grid, scenarios)
+        n_scen, n_drivers, n_feat = X.shape
+        probs = self.predict_matrix(X.reshape(-1, n_feat))
+
+        grid_col = self.features.index("Grid_Position")
+        gap_col = self.features.index("Qualifying_Gap_to_Pole")
+        out = pd.DataFrame({
+            "Scenario": np.repeat(np.arange(n_scen), n_drivers),
+            "Driver_ID": np.tile(driver_ids, n_scen),
+            "Grid_Position": X[:, :, grid_col].ravel(),
+            "Qualifying_Gap_to_Pole": X[:, :, gap_col].ravel(),
+            "Win_Probability": probs,
+        })
+        out["Predicted_Rank"] = (
+            out.groupby("Scenario")["Win_Probability"].rank(ascending=False, method="first").astype(int)
+        )
+        return out
+
+
+if __name__ == "__main__":
+    predictor = ScenarioPredictor(MODEL_PATH)
+    base = pd.read_csv(PREDICTION_INPUT_PATH)
+    pole, second = base.sort_values("Grid_Position")["Driver_ID"].iloc[:2]
+
+    scenarios = [{}]
+    scenarios += [{"penalties": {pole: n}} for n in (3, 5, 10)]
+    scenarios += [{"swaps": [(pole, second)]}]
+    scenarios += [{"gap_deltas": {second: -d}} for d in (0.05, 0.1, 0.2)]
+
+    results = predictor.run(base, scenarios)
+    print(results[results["Predicted_Rank"] <= 3].to_string(index=False))
+    print(f"\n🧠 Cache: {len(predictor.cache)} rows, {predictor.cache.hits} hits / {predictor.cache.misses} misses")
@@ -0,0 +1,255 @@
+"""
+telemetry_store.py
+Memory-mapped car telemetry store + vectorized per-driver feature extractor.
+
+Layout (one folder per Race_ID):
+    data/telemetry/<Race_ID>/speed.npy      float32  km/h
+    data/telemetry/<Race_ID>/throttle.npy   float32  0-100
+    data/telemetry/<Race_ID>/brake.npy      bool
+    data/telemetry/<Race_ID>/gear.npy       uint8
+    data/telemetry/<Race_ID>/distance.npy   float32  metres since lap start
+    data/telemetry/<Race_ID>/lap.npy        uint16   lap number
+    data/telemetry/<Race_ID>/corners.npy    float32  corner apex distances
+    data/telemetry/<Race_ID>/index.csv      Driver, Driver_Code, Start, Stop (row offsets)
+
+Samples are stored driver-by-driver, so each driver is a contiguous
+[Start, Stop) slice of every channel. Qualifying telemetry is stored by
+default: it is known before the race, so the features can be used to
+predict it without leaking the result.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from config import TELEMETRY_DIR
+
+CHANNELS = {
+    "speed": np.float32,
+    "throttle": np.float32,
+    "brake": np.bool_,
+    "gear": np.uint8,
+    "distance": np.float32,
+    "lap": np.uint16,
+}
+CORNER_WINDOW_M = 75.0     # +/- metres around the apex searched for the minimum speed
+FULL_THROTTLE_PCT = 98.0
+
+TELEMETRY_FEATURES = [
+    "Speed_Trap_Kph",
+    "Brake_Time_Ratio",
+    "Braking_Events_Per_Lap",
+    "Full_Throttle_Ratio",
+    "Corner_Min_Speed_Kph",
+]
+
+
+# ============================
+# 1. Writer
+# ============================
+def _driver_channels(session, driver_number):
+    """Car data for one driver's quick laps, tagged with lap number and lap distance."""
+    laps = session.laps.pick_drivers(driver_number).pick_quicklaps()
+    laps = laps[laps["LapStartTime"].notna() & laps["LapTime"].notna()]
+    if laps.empty:
+        return None
+
+    car = laps.get_car_data().add_distance()
+    t = car["SessionTime"].to_numpy()
+    lap_start = laps["LapStartTime"].to_numpy()
+    lap_end = (laps["LapStartTime"] + laps["LapTime"]).to_numpy()
+
+    # Assign every sample to the lap it falls in and drop the gaps between quick laps
+    lap_idx = np.searchsorted(lap_start, t, side="right") - 1
+    keep = (lap_idx >= 0) & (t <= lap_end[np.clip(lap_idx, 0, None)])
+    if not keep.any():
+        return None
+    lap_idx = lap_idx[keep]
+
+    # Distance since the start of each lap
+    dist = car["Distance"].to_numpy()[keep]
+    starts = np.flatnonzero(np.r_[True, lap_idx[1:] != lap_idx[:-1]])
+    dist = dist - np.repeat(dist[starts], np.diff(np.r_[starts, len(dist)]))
+
+    return {
+        "speed": car["Speed"].to_numpy()[keep],
+        "throttle": car["Throttle"].to_numpy()[keep],
+        "brake": car["Brake"].to_numpy()[keep].astype(bool),
+        "gear": car["nGear"].to_numpy()[keep],
+        "distance": dist,
+        "lap": laps["LapNumber"].to_numpy()[lap_idx],
+    }
+
+
+def write_session_telemetry(session, race_id, store_dir=TELEMETRY_DIR, driver_codes=None):
+    """
+    Writes a loaded FastF1 session's speed/throttle/brake/gear channels to the store.
+    driver_codes maps car number -> registry Driver_Code (stored in the index).
+    """
+    parts = {name: [] for name in CHANNELS}
+    index_rows = []
+    offset = 0
+
+    for driver_number in session.drivers:
+        try:
+            driver = session.get_driver(driver_number)["Abbreviation"]
+            channels = _driver_channels(session, driver_number)
+        except Exception as e:
+            print(f"   ⚠️ No telemetry for driver {driver_number} in {race_id}: {e}")
+            continue
+        if channels is None:
+            continue
+
+        n = len(channels["speed"])
+        for name in CHANNELS:
+            parts[name].append(channels[name])
+        row = {"Driver": driver, "Start": offset, "Stop": offset + n}
+        if driver_codes is not None:
+            row["Driver_Code"] = driver_codes.get(str(driver_number))
+        index_rows.append(row)
+        offset += n
+
+    if not index_rows:
+        print(f"   ⚠️ No telemetry written for {race_id}")
+        return None
+
+    race_dir = os.path.join(store_dir, str(race_id))
+    os.makedirs(race_dir, exist_ok=True)
+    for name, dtype in CHANNELS.items():
+        np.save(os.path.join(race_dir, f"{name}.npy"), np.concatenate(parts[name]).astype(dtype))
+
+    try:
+        corners = session.get_circuit_info().corners["Distance"].to_numpy()
+    except Exception:
+        corners = np.array([])
+    np.save(os.path.join(race_dir, "corners.npy"), np.sort(corners).astype(np.float32))
+
+    pd.DataFrame(index_rows).to_csv(os.path.join(race_dir, "index.csv"), index=False)
+    return race_dir
+
+
+# ============================
+# 2. Reader
+# ============================
+def open_session(race_id, store_dir=TELEMETRY_DIR):
+    """Memory-maps one session's channels. Returns (channels, index, corners)."""
+    race_dir = os.path.join(store_dir, str(race_id))
+    channels = {
+        name: np.load(os.path.join(race_dir, f"{name}.npy"), mmap_mode="r")
+        for name in CHANNELS
+    }
+    index = pd.read_csv(os.path.join(race_dir, "index.csv"))
+    corners = np.load(os.path.join(race_dir, "corners.npy"))
+    return channels, index, corners
+
+
+def stored_race_ids(store_dir=TELEMETRY_DIR):
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(
+        d for d in os.listdir(store_dir)
+        if os.path.exists(os.path.join(store_dir, d, "index.csv"))
+    )
+
+
+# ============================
+# 3. Vectorized Extractor
+# ============================
+def _per_lap_reduce(ufunc, values, group, n_drivers, n_laps, fill):
+    """Reduces values into a (driver, lap) grid, then takes the median over laps."""
+    grid = np.full(n_drivers * n_laps, fill, dtype=np.float64)
+    ufunc.at(grid, group, values)
+    grid[grid == fill] = np.nan
+    return np.nanmedian(grid.reshape(n_drivers, n_laps), axis=1)
+
+
+def extract_features(race_id, store_dir=TELEMETRY_DIR, corner_window=CORNER_WINDOW_M):
+    """
+    Speed-trap, braking, throttle and corner-minimum-speed features per driver,
+    computed straight from the memory-mapped arrays (no per-driver DataFrames).
+    """
+    channels, index, corners = open_session(race_id, store_dir)
+    speed = channels["speed"]
+    brake = channels["brake"]
+    lap = channels["lap"].astype(np.int64)
+
+    starts = index["Start"].to_numpy()
+    lengths = (index["Stop"] - index["Start"]).to_numpy()
+    n_drivers = len(index)
+    driver_idx = np.repeat(np.arange(n_drivers), lengths)
+
+    # Lap numbers local to each driver -> dense (driver, lap) group ids
+    n_laps = int(lap.max()) + 1
+    group = driver_idx * n_laps + lap
+    laps_per_driver = np.add.reduceat(
+        np.r_[True, group[1:] != group[:-1]].astype(np.int64), starts
+    )
+
+    # Speed trap: median over laps of each lap's top speed
+    speed_trap = _per_lap_reduce(np.maximum, speed, group, n_drivers, n_laps, -np.inf)
+
+    # Braking: share of samples on the brake and brake applications per lap
+    brake_ratio = np.add.reduceat(brake.astype(np.int64), starts) / lengths
+    onsets = brake & ~np.r_[False, brake[:-1]]
+    onsets[starts] = brake[starts]
+    brake_events = np.add.reduceat(onsets.astype(np.int64), starts) / laps_per_driver
+
+    full_throttle = np.add.reduceat(
+        (channels["throttle"] >= FULL_THROTTLE_PCT).astype(np.int64), starts
+    ) / lengths
+
+    # Corner minimum speed: nearest apex per sample, min inside the window,
+    # median over laps per corner, then mean over corners
+    if len(corners):
+        distance = channels["distance"]
+        nearest = np.clip(np.searchsorted(corners, distance), 1, len(corners) - 1)
+        left = np.abs(distance - corners[nearest - 1]) <= np.abs(distance - corners[nearest])
+        nearest = np.where(left, nearest - 1, nearest)
+        in_window = np.abs(distance - corners[nearest]) <= corner_window
+
+        n_corners = len(corners)
+        cell = (group[in_window] * n_corners + nearest[in_window])
+        grid = np.full(n_drivers * n_laps * n_corners, np.inf)
+        np.minimum.at(grid, cell, speed[in_window])
+        grid[np.isinf(grid)] = np.nan
+        grid = grid.reshape(n_drivers, n_laps, n_corners)
+        with np.errstate(all="ignore"):
+            corner_min = np.nanmean(np.nanmedian(grid, axis=1), axis=1)
+    else:
+        corner_min = np.full(n_drivers, np.nan)
+
+    features = pd.DataFrame({
+        "Race_ID": race_id,
+        "Driver": index["Driver"].to_numpy(),
+        "Speed_Trap_Kph": speed_trap,
+        "Brake_Time_Ratio": brake_ratio,
+        "Braking_Events_Per_Lap": brake_events,
+        "Full_Throttle_Ratio": full_throttle,
+        "Corner_Min_Speed_Kph": corner_min,
+    })
+    if "Driver_Code" in index.columns:
+        features.insert(2, "Driver_Code", index["Driver_Code"].to_numpy())
+    return features
+
+
+def add_telemetry_features(df, store_dir=TELEMETRY_DIR):
+    """Left-joins telemetry features onto processed data via Race_ID/Driver_Code (Driver for older stores)."""
+    race_ids = set(df["Race_ID"].astype(str))
+    frames = [extract_features(r, store_dir) for r in stored_race_ids(store_dir) if r in race_ids]
+    if not frames:
+        print("ℹ️ No stored telemetry matches these races — skipping telemetry features.")
+        return df
+
+    features = pd.concat(frames, ignore_index=True)
+    df = df.drop(columns=TELEMETRY_FEATURES, errors="ignore")
+    df["Race_ID"] = df["Race_ID"].astype(str)
+    print(f"✅ Joined telemetry features for {len(frames)} session(s)")
+    if "Driver_Code" in df.columns and "Driver_Code" in features.columns and features["Driver_Code"].notna().all():
+        features = features.drop(columns="Driver").astype({"Driver_Code": np.int64})
+        return df.merge(features, on=["Race_ID", "Driver_Code"], how="left")
+    return df.merge(features.drop(columns="Driver_Code", errors="ignore"), on=["Race_ID", "Driver"], how="left")
+
+
+if __name__ == "__main__":
+    for race_id in stored_race_ids():
+        print(extract_features(race_id).round(3))
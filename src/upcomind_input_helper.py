@@ -2,19 +2,20 @@ import fastf1
 import pandas as pd
 import os
 from datetime import datetime
+from config import CACHE_DIR, QUALIFYING_PATH, UPCOMING_SEASON, UPCOMING_ROUND, UPCOMING_GRAND_PRIX
 
 def fetch_upcoming_qualifying(season, grand_prix_name, race_round, output_path):
     """
     Fetches qualifying results from FastF1 and saves to CSV with:
-    Driver_ID, Grid_Position, Qualifying_Time, Race_ID, Circuit_Name
+    Driver_ID, Abbreviation, DriverId, Grid_Position, Qualifying_Time, Race_ID, Circuit_Name
     """
 
     # ✅ Ensure cache directory exists (inside data/)
-    os.makedirs('data/cache', exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
 
     # ✅ Enable FastF1 cache in that directory
-    fastf1.Cache.enable_cache('data/cache')
-    print("✅ FastF1 cache enabled at: data/cache")
+    fastf1.Cache.enable_cache(CACHE_DIR)
+    print(f"✅ FastF1 cache enabled at: {CACHE_DIR}")
 
     # Load qualifying session
     session = fastf1.get_session(season, race_round, 'Q')
@@ -40,6 +41,8 @@ def fetch_upcoming_qualifying(season, grand_prix_name, race_round, output_path):
 
             results.append({
                 'Driver_ID': driver_id,
+                'Abbreviation': getattr(row, 'Abbreviation', None),
+                'DriverId': getattr(row, 'DriverId', None),
                 'Grid_Position': grid_pos,
                 'Qualifying_Time': qual_time_sec,
                 'Race_ID': race_id,
@@ -60,8 +63,8 @@ def fetch_upcoming_qualifying(season, grand_prix_name, race_round, output_path):
 
 if __name__ == "__main__":
     fetch_upcoming_qualifying(
-        season=2025,
-        grand_prix_name='São Paulo Grand Prix',
-        race_round=21,
-        output_path='data/upcoming_qualifying.csv'
+        season=UPCOMING_SEASON,
+        grand_prix_name=UPCOMING_GRAND_PRIX,
+        race_round=UPCOMING_ROUND,
+        output_path=QUALIFYING_PATH
     )
@@ -1,5 +1,30 @@
+import os
 import pandas as pd
 import numpy as np
+from identity_registry import IdentityRegistry
+from config import (DATA_DIR, PROCESSED_DATA_PATH, QUALIFYING_PATH, PREDICTION_INPUT_PATH, UPCOMING_RACE_ID,
+                    UPCOMING_GRAND_PRIX)
+
+def safe_mean(series):
+    return series.mean() if len(series) > 0 else np.nan
+
+def safe_sum(series):
+    return series.sum() if len(series) > 0 else 0
+
+def compute_driver_history(processed_df, driver_code, upcoming_race_id):
+    """History features for one driver (registry Driver_Code) — known before qualifying."""
+    # Filter historical data for the driver for races before upcoming race
+    driver_hist = processed_df[(processed_df['Driver_Code'] == driver_code) & (processed_df['Race_ID'] < upcoming_race_id)]
+
+    return {
+        'Avg_Finish_Position_L5': safe_mean(driver_hist.tail(5)['Finish_Position']),
+        'Recent_DNF_Count_L5': safe_sum(driver_hist.tail(5)['Status'].apply(lambda x: 1 if x == 'DNF' else 0)),
+        'Avg_Racecraft_Score_L22': safe_mean(driver_hist.tail(22)['Avg_Racecraft_Score_L22']),
+        'Track_Specialization_Index_L22': safe_mean(driver_hist.tail(22)['Track_Specialization_Index_L22']),
+        'Recent_Car_Pace_Delta_L5': safe_mean(driver_hist.tail(5)['Recent_Car_Pace_Delta_L5']),
+        'Team_Avg_Pace_Delta_L22': safe_mean(driver_hist.tail(22)['Team_Avg_Pace_Delta_L22']),
+        'Overall_Reliability_Rate_L22': safe_mean(driver_hist.tail(22)['Overall_Reliability_Rate_L22']),
+    }
 
 def generate_prediction_input(processed_data_path, qualifying_data_path, x_train_path, upcoming_race_id, upcoming_circuit_name, output_path):
     # Load processed historical data
@@ -9,6 +34,10 @@ def generate_prediction_input(processed_data_path, qualifying_data_path, x_train
     qual_df = pd.read_csv(qualifying_data_path)
     qual_df.columns = qual_df.columns.str.strip()
 
+    # DriverId / Abbreviation -> stable driver codes (car numbers can change between seasons)
+    season = int(str(upcoming_race_id).split('_')[0])
+    qual_df['Driver_Code'] = IdentityRegistry().resolve_drivers(qual_df, season)
+
     # Load training data to get one-hot encoded circuit columns
     x_train = pd.read_csv(x_train_path)
     circuit_cols = [col for col in x_train.columns if col.startswith('Circuit_Name_')]
@@ -20,21 +49,8 @@ def generate_prediction_input(processed_data_path, qualifying_data_path, x_train
     feature_rows = []
 
     for driver_id in drivers:
-        # Filter historical data for the driver for races before upcoming race
-        driver_hist = processed_df[(processed_df['Driver_ID'] == driver_id) & (processed_df['Race_ID'] < upcoming_race_id)]
-
-        def safe_mean(series):
-            return series.mean() if len(series) > 0 else np.nan
-        def safe_sum(series):
-            return series.sum() if len(series) > 0 else 0
-
-        avg_finish_l5 = safe_mean(driver_hist.tail(5)['Finish_Position'])
-        recent_dnf_l5 = safe_sum(driver_hist.tail(5)['Status'].apply(lambda x: 1 if x == 'DNF' else 0))
-        avg_racecraft_l22 = safe_mean(driver_hist.tail(22)['Avg_Racecraft_Score_L22'])
-        track_spec_l22 = safe_mean(driver_hist.tail(22)['Track_Specialization_Index_L22'])
-        recent_car_pace_delta_l5 = safe_mean(driver_hist.tail(5)['Recent_Car_Pace_Delta_L5'])
-        team_avg_pace_delta_l22 = safe_mean(driver_hist.tail(22)['Team_Avg_Pace_Delta_L22'])
-        overall_reliability_l22 = safe_mean(driver_hist.tail(22)['Overall_Reliability_Rate_L22'])
+        driver_code = qual_df[qual_df['Driver_ID'] == driver_id]['Driver_Code'].values[0]
+        history = compute_driver_history(processed_df, driver_code, upcoming_race_id)
 
         pole_qual_time = qual_df['Qualifying_Time'].min() if 'Qualifying_Time' in qual_df.columns else np.nan
         driver_qual_time = qual_df[qual_df['Driver_ID'] == driver_id]['Qualifying_Time'].values
@@ -52,13 +68,8 @@ def generate_prediction_input(processed_data_path, qualifying_data_path, x_train
 
         feature_dict = {
             'Driver_ID': driver_id,  # <-- Added Driver_ID here
-            'Avg_Finish_Position_L5': avg_finish_l5,
-            'Recent_DNF_Count_L5': recent_dnf_l5,
-            'Avg_Racecraft_Score_L22': avg_racecraft_l22,
-            'Track_Specialization_Index_L22': track_spec_l22,
-            'Recent_Car_Pace_Delta_L5': recent_car_pace_delta_l5,
-            'Team_Avg_Pace_Delta_L22': team_avg_pace_delta_l22,
-            'Overall_Reliability_Rate_L22': overall_reliability_l22,
+            'Driver_Code': driver_code,
+            **history,
             'Qualifying_Gap_to_Pole': qualifying_gap_to_pole,
             'Grid_Position': grid_position,
         }
@@ -77,10 +88,10 @@ def generate_prediction_input(processed_data_path, qualifying_data_path, x_train
 
 if __name__ == "__main__":
     generate_prediction_input(
-        processed_data_path='data/processed_data.csv',
-        qualifying_data_path='data/upcoming_qualifying.csv',
-        x_train_path='data/x_train.csv',
-        upcoming_race_id='2025_20',
-        upcoming_circuit_name='Mexico City Grand Prix',
-        output_path='data/new_data.csv'
+        processed_data_path=PROCESSED_DATA_PATH,
+        qualifying_data_path=QUALIFYING_PATH,
+        x_train_path=os.path.join(DATA_DIR, 'X_train.csv'),
+        upcoming_race_id=UPCOMING_RACE_ID,
+        upcoming_circuit_name=UPCOMING_GRAND_PRIX,
+        output_path=PREDICTION_INPUT_PATH
     )